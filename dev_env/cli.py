@@ -0,0 +1,97 @@
+from pathlib import Path
+
+import typer
+from typing_extensions import Annotated
+
+from dev_env.core.http_cache import set_offline
+
+app = typer.Typer(name="Calmmage Dev Env")
+
+
+@app.callback()
+def main(
+    offline: Annotated[
+        bool,
+        typer.Option("--offline", help="Serve github api data from the local cache, even if stale."),
+    ] = False,
+):
+    if offline:
+        set_offline(True)
+
+
+@app.command(name="setup", help="Create work dirs, clone / pull all projects")
+def setup(
+    workers: Annotated[
+        int,
+        typer.Option("--workers", "-w", help="Number of repos synced in parallel."),
+    ] = None,
+):
+    from dev_env.setup.main import setup as setup_dev_env
+
+    setup_dev_env(workers=workers)
+
+
+@app.command(name="promote", help="Move repo to a higher tier dir, backfilling a partial / shallow clone")
+def promote(
+    repo_path: Annotated[
+        Path,
+        typer.Argument(..., file_okay=False, help="Path to the local repo."),
+    ],
+    tier: Annotated[
+        str,
+        typer.Option("--tier", "-t", help="Target tier: experiments, projects or archive."),
+    ] = "projects",
+):
+    from dev_env.core.ffs import promote_repo
+
+    new_path = promote_repo(repo_path.expanduser().absolute(), tier)
+    typer.echo(f"Repo is now at {new_path}")
+
+
+@app.command(name="mirrors", help="Update all local repo mirrors")
+def mirrors():
+    from dev_env.core.mirrors import update_all_mirrors
+
+    update_all_mirrors()
+
+
+@app.command(name="status", help="Show dirty / ahead / behind state of all local repos")
+def status(
+    sort: Annotated[
+        str,
+        typer.Option("--sort", "-s", help="Sort by: name, dirty, ahead, behind or age."),
+    ] = "name",
+    reverse: Annotated[
+        bool,
+        typer.Option("--reverse", "-r", help="Reverse the sort order."),
+    ] = False,
+    all_repos: Annotated[
+        bool,
+        typer.Option("--all", "-a", help="Also show clean repos that are in sync."),
+    ] = False,
+    refresh: Annotated[
+        bool,
+        typer.Option("--refresh", help="Ignore the cached statuses."),
+    ] = False,
+    workers: Annotated[
+        int,
+        typer.Option("--workers", "-w", help="Number of parallel git calls."),
+    ] = None,
+):
+    from dev_env.core.fleet_status import collect_fleet_status, format_status_table
+
+    statuses = collect_fleet_status(workers=workers, refresh=refresh)
+    shown = statuses if all_repos else [s for s in statuses if s.needs_attention]
+    typer.echo(format_status_table(shown, sort=sort, reverse=reverse))
+    typer.echo(f"{len(shown)} of {len(statuses)} repos shown")
+
+
+@app.command(name="watch", help="Keep the local repo inventory live with inotify (Linux). Runs until stopped.")
+def watch():
+    from dev_env.core.inventory_watcher import run_inventory_watcher
+
+    run_inventory_watcher()
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,92 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Set
+
+NGRAM_SIZE = 3
+
+
+def normalize_identity(identity: str) -> str:
+    return identity.strip().lower()
+
+
+def get_ngrams(text: str, n: int = NGRAM_SIZE) -> Set[str]:
+    return {text[i : i + n] for i in range(len(text) - n + 1)}
+
+
+class AuthorIndex:
+    """
+    Inverted index: normalized author identity (name or email) -> repo paths.
+    Substring patterns are answered through lowercase trigrams of the identities,
+    so a filter only checks the few identities that share all trigrams of the pattern.
+    """
+
+    def __init__(self, repo_authors: Dict[str, Iterable[str]] = None):
+        self.by_identity: Dict[str, Set[str]] = defaultdict(set)
+        self.by_ngram: Dict[str, Set[str]] = defaultdict(set)
+        self.repo_identities: Dict[str, Set[str]] = {}
+
+        for repo, identities in (repo_authors or {}).items():
+            self.add(repo, identities)
+
+    def add(self, repo: str, identities: Iterable[str]):
+        """Index the repo under its identities, replacing what was indexed for it before"""
+        identities = {normalize_identity(i) for i in identities if i and i.strip()}
+        if self.repo_identities.get(repo) == identities:
+            return
+        self.remove(repo)
+        self.repo_identities[repo] = identities
+        for identity in identities:
+            if identity not in self.by_identity:
+                for ngram in get_ngrams(identity):
+                    self.by_ngram[ngram].add(identity)
+            self.by_identity[identity].add(repo)
+
+    def remove(self, repo: str):
+        for identity in self.repo_identities.pop(repo, ()):
+            repos = self.by_identity[identity]
+            repos.discard(repo)
+            if repos:
+                continue
+            del self.by_identity[identity]
+            for ngram in get_ngrams(identity):
+                self.by_ngram[ngram].discard(identity)
+                if not self.by_ngram[ngram]:
+                    del self.by_ngram[ngram]
+
+    def find_identities(self, pattern: str) -> Set[str]:
+        """Identities containing the pattern (case-insensitive)"""
+        pattern = normalize_identity(pattern)
+        if len(pattern) < NGRAM_SIZE:
+            # too short for trigrams - scan the identities, there are far fewer of them than repos
+            candidates = self.by_identity.keys()
+        else:
+            ngram_sets = sorted((self.by_ngram.get(ngram, set()) for ngram in get_ngrams(pattern)), key=len)
+            candidates = set.intersection(*ngram_sets) if ngram_sets else set()
+        return {identity for identity in candidates if pattern in identity}
+
+    def find(self, patterns: Iterable[str]) -> Set[str]:
+        """Repos with an author matching any of the patterns"""
+        repos = set()
+        for pattern in patterns:
+            for identity in self.find_identities(pattern):
+                repos |= self.by_identity[identity]
+        return repos
+
+    def __len__(self):
+        return len(self.repo_identities)
+
+
+class StoredAuthorIndex:
+    """
+    AuthorIndex.find over the authors / author_ngrams tables of an InventoryStore.
+    Nothing is loaded up front - every lookup is a few indexed queries.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def find(self, patterns: Iterable[str]) -> Set[str]:
+        """Repos with an author matching any of the patterns"""
+        return self.store.find_repos_by_author(patterns)
+
+    def __len__(self):
+        return self.store.conn.execute("SELECT COUNT(DISTINCT path) FROM authors").fetchone()[0]
@@ -0,0 +1,120 @@
+import configparser
+import os
+import re
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from github.Repository import Repository
+from loguru import logger
+
+from dev_env.core.constants import all_projects_dirs, archive_dir, experiments_dir, projects_dir
+
+# same order in which check_repo_cloned used to probe - first match wins
+PRIORITY_DIRS = [experiments_dir, projects_dir, archive_dir]
+
+
+def normalize_remote_url(url: str) -> str:
+    """
+    https://github.com/calmmage/calmlib.git, git@github.com:calmmage/calmlib.git
+    and https://TOKEN@github.com/calmmage/calmlib -> github.com/calmmage/calmlib
+    """
+    url = url.strip()
+    match = re.match(r"^(?:[a-z+]+://)?(?:[^@/]+@)?([^/:]+)[/:](.+?)(?:\.git)?/?$", url)
+    if match is None:
+        return url.lower()
+    host, path = match.groups()
+    return f"{host}/{path}".lower()
+
+
+def read_remote_url(repo_path: Path, remote: str = "origin") -> Optional[str]:
+    """Read remote url straight from .git/config - much cheaper than opening the repo with GitPython"""
+    config_path = Path(repo_path) / ".git" / "config"
+    parser = configparser.ConfigParser(strict=False, interpolation=None)
+    try:
+        parser.read(config_path)
+    except configparser.Error as e:
+        logger.debug(f"Failed to parse {config_path}: {e}")
+        return None
+    section = f'remote "{remote}"'
+    if parser.has_section(section):
+        return parser.get(section, "url", fallback=None)
+    return None
+
+
+class CheckoutIndex:
+    """
+    Where github repos are checked out locally.
+    Built in a single scandir pass over all_projects_dirs (including nested dirs like seasonal/yyyy-mm-mmm),
+    then the clone pipeline asks the index instead of probing the filesystem per repo.
+    """
+
+    def __init__(self, dirs: List[Path] = None, max_depth: int = 2):
+        if dirs is None:
+            dirs = PRIORITY_DIRS + [d for d in all_projects_dirs if d not in PRIORITY_DIRS]
+        self.by_name: Dict[str, List[Path]] = defaultdict(list)
+        self.by_remote: Dict[str, Path] = {}
+        self.remotes: Dict[Path, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+        for root in dirs:
+            self._scan(Path(root), max_depth)
+        logger.debug(f"Indexed {len(self.remotes)} local checkouts")
+
+    def _scan(self, path: Path, depth: int):
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            return
+        for entry in entries:
+            # don't follow symlinks (seasonal/latest etc.) - the target is indexed on its own
+            if entry.name.startswith(".") or not entry.is_dir(follow_symlinks=False):
+                continue
+            entry_path = Path(entry.path)
+            if os.path.exists(os.path.join(entry.path, ".git")):
+                self.add(entry_path)
+            elif depth > 1:
+                self._scan(entry_path, depth - 1)
+
+    def add(self, path: Path, remote_url: str = None):
+        """Register a checkout. remote_url is read from .git/config if not provided."""
+        path = Path(path)
+        if remote_url is None:
+            remote_url = read_remote_url(path)
+        remote = normalize_remote_url(remote_url) if remote_url else None
+        with self._lock:
+            self.remotes[path] = remote
+            self.by_name[path.name].append(path)
+            if remote and remote not in self.by_remote:
+                self.by_remote[remote] = path
+
+    def remove(self, path: Path):
+        path = Path(path)
+        with self._lock:
+            remote = self.remotes.pop(path, None)
+            if remote and self.by_remote.get(remote) == path:
+                del self.by_remote[remote]
+            if path in self.by_name.get(path.name, []):
+                self.by_name[path.name].remove(path)
+
+    def move(self, old_path: Path, new_path: Path):
+        remote = self.remotes.get(Path(old_path))
+        self.remove(old_path)
+        self.add(new_path, remote_url=remote or "")
+
+    def find(self, repo: Repository) -> Optional[Path]:
+        """
+        Local path of the repo: match by remote url first, then by name.
+        A name match is skipped if the checkout is known to point to a different remote.
+        """
+        remotes = {normalize_remote_url(url) for url in [repo.clone_url, getattr(repo, "ssh_url", None)] if url}
+        with self._lock:
+            for remote in remotes:
+                if remote in self.by_remote:
+                    return self.by_remote[remote]
+            for path in self.by_name.get(repo.name, []):
+                if self.remotes[path] is None or self.remotes[path] in remotes:
+                    return path
+        return None
@@ -4,12 +4,17 @@ from git import Repo
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from dev_env.core.git_utils import (
-    get_all_repos,
+    iter_all_repos,
+    iter_allowed_repos,
     check_repo_allowed,
     check_repo_cloned,
     clone_repo,
     create_and_clone_repo,
 )
+from dev_env.core.repo_updates import backfill_repo, pull_repo, remote_has_changes
+from dev_env.core.checkout_index import CheckoutIndex
+from dev_env.core.github_gateway import get_api_metrics
+from dev_env.core.layout import Layout, Plan, reconcile
 from dev_env.core.settings import settings
 from dev_env.core.constants import (
     all_projects_dirs,
@@ -19,7 +24,7 @@ from dev_env.core.constants import (
     experiments_dir,
     contexts_dir,
 )
-from dev_env.setup.setup_shell_profiles_and_env import git_pull_with_fetch
+from dev_env.core.sync_engine import RepoSyncResult, SyncLimits, SyncStatus, run_parallel, summarize
 
 
 from datetime import datetime, timedelta
@@ -53,16 +58,11 @@ from pytz import timezone
 # region  idea 1
 
 
-def create_dirs():
-    settings.root_dir.mkdir(parents=True, exist_ok=True)
-    settings.symlinks_dir.mkdir(parents=True, exist_ok=True)
-    settings.env_dir.mkdir(parents=True, exist_ok=True)
-
-    for dir_path in all_projects_dirs:
-        # for dir in settings.structural_dirs:
-        # dir_path = settings.root_dir / dir
-        if not dir_path.exists():
-            dir_path.mkdir()
+def create_dirs(dry_run: bool = False) -> Plan:
+    # for dir in settings.structural_dirs:
+    # dir_path = settings.root_dir / dir
+    layout = Layout(dirs=[settings.root_dir, settings.symlinks_dir, settings.env_dir, *all_projects_dirs])
+    return reconcile(layout, dry_run)
 
 
 # endregion
@@ -74,23 +74,27 @@ def create_dirs():
 
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-def clone_single_repo(repo, target_dir):
+def clone_single_repo(
+    repo, target_dir, limits: SyncLimits = None, checkout_index: CheckoutIndex = None
+) -> RepoSyncResult:
     try:
-        local_repo_path = check_repo_cloned(repo)
+        local_repo_path = check_repo_cloned(repo, checkout_index)
         if local_repo_path:
             if repo.name in settings.main_projects and local_repo_path.parent != projects_dir:
                 logger.warning(f"Main repo {local_repo_path} is not in {projects_dir}")
-                logger.info(f"Moving {local_repo_path} to {projects_dir}")
-                local_repo_path.rename(projects_dir / local_repo_path.name)
-                local_repo_path = projects_dir / local_repo_path.name
+                local_repo_path = promote_repo(local_repo_path, "projects", limits, checkout_index)
 
             try:
                 local_repo = Repo(local_repo_path)
-                git_pull_with_fetch(local_repo)
+                # most repos are idle - don't pay for a full fetch if the remote has nothing new
+                fetch = not settings.sync_precheck or remote_has_changes(local_repo, repo, limits)
+                updated = pull_repo(local_repo, limits, fetch=fetch)
                 logger.info(f"Successfully pulled changes for {local_repo_path}")
             except Exception as e:
                 logger.error(f"Failed to pull {local_repo_path}: {e}")
-            return
+                return RepoSyncResult(repo.name, SyncStatus.FAILED, local_repo_path, error=str(e))
+            status = SyncStatus.PULLED if updated else SyncStatus.UP_TO_DATE
+            return RepoSyncResult(repo.name, status, local_repo_path, fetch_skipped=not fetch)
 
         # clone
         # determine target dir
@@ -108,14 +112,62 @@ def clone_single_repo(repo, target_dir):
             target_dir = archive_dir
 
         target_path = target_dir / repo.name
-        clone_repo(repo, target_path)
+        policy = settings.clone_policies.get(target_dir.name, "full")
+        if clone_repo(repo, target_path, limits=limits, policy=policy) is None:
+            # clone_repo logs and swallows the error - raise to let the retry kick in
+            raise RuntimeError(f"Failed to clone {repo.name} to {target_path}")
+        if checkout_index is not None:
+            checkout_index.add(target_path, repo.clone_url)
         logger.info(f"Successfully cloned {repo.name} to {target_path}")
+        return RepoSyncResult(repo.name, SyncStatus.CLONED, target_path)
     except Exception as e:
         logger.error(f"Failed to clone or update repo {repo.name}: {e}")
         raise
 
 
-def clone_projects():
+tier_dirs = {
+    "experiments": experiments_dir,
+    "projects": projects_dir,
+    "archive": archive_dir,
+}
+
+
+def promote_repo(
+    local_repo_path: Path, tier: str = "projects", limits: SyncLimits = None, checkout_index: CheckoutIndex = None
+) -> Path:
+    """
+    Move a local repo to another tier dir.
+    If the repo was cloned partially (e.g. blobless in archive) - backfill it to match the new tier's clone policy.
+    Args:
+        local_repo_path (Path): current location of the repo.
+        tier (str): experiments, projects or archive.
+    Returns:
+        new repo path.
+    """
+    if tier not in tier_dirs:
+        raise ValueError(f"Invalid tier: {tier}. Available tiers: {list(tier_dirs)}")
+    local_repo_path = Path(local_repo_path)
+    target_path = tier_dirs[tier] / local_repo_path.name
+    if local_repo_path != target_path and target_path.exists():
+        raise FileExistsError(f"Destination already exists: {target_path}")
+
+    backfill_repo(Repo(local_repo_path), settings.clone_policies.get(tier, "full"), limits)
+    if local_repo_path != target_path:
+        logger.info(f"Moving {local_repo_path} to {target_path}")
+        local_repo_path.rename(target_path)
+        if checkout_index is not None:
+            checkout_index.move(local_repo_path, target_path)
+    return target_path
+
+
+def clone_projects(workers: int = None) -> list[RepoSyncResult]:
+    """
+    Clone all allowed repos from github, pull the ones that are already cloned.
+    Args:
+        workers (int): number of repos processed in parallel. If None, use settings.clone_workers.
+    Returns:
+        list of per-repo results.
+    """
 
     # list all projects in my github
     # select only the ones in the accounts_to_clone_from
@@ -126,16 +178,30 @@ def clone_projects():
     # logic 2: first check if repo is cloned _somewhere_
     # main repos -> move to projects dir
     # others -> don't touch
+    if workers is None:
+        workers = settings.clone_workers
+    limits = SyncLimits(network=settings.clone_network_concurrency, disk=settings.clone_disk_concurrency)
+    # one pass over all local project dirs instead of probing the filesystem for every repo
+    checkout_index = CheckoutIndex()
 
-    repos_list = get_all_repos()
-    for repo in repos_list:
-        if not check_repo_allowed(repo):
-            continue
-
+    def sync_repo(repo) -> RepoSyncResult:
         try:
-            clone_single_repo(repo, None)  # We'll determine the target_dir inside the function
+            return clone_single_repo(repo, None, limits, checkout_index)  # We'll determine the target_dir inside the function
         except Exception as e:
             logger.error(f"Failed to process repo {repo.name} after multiple attempts: {e}")
+            return RepoSyncResult(repo.name, SyncStatus.FAILED, error=str(e))
+
+    # stream the listing - repos are queued for cloning as soon as their page arrives
+    listing = iter_allowed_repos() if settings.list_repos_per_account else iter_all_repos()
+    repos = (repo for repo in listing if check_repo_allowed(repo))
+    results = run_parallel(repos, sync_repo, workers=workers)
+
+    logger.info(f"Synced {len(results)} repos: {summarize(results)}")
+    logger.info(f"Github api: {get_api_metrics()}")
+    for result in results:
+        if result.status == SyncStatus.FAILED:
+            logger.warning(f"Failed: {result.name} - {result.error}")
+    return results
 
 
 # endregion idea 2 - clone projects
@@ -206,12 +272,7 @@ def setup_seasonal_folder(dt: datetime = None):
         logger.info(f"Seasonal directory already exists: {seasonal_dir_path}")
 
     # step 3: check latest softlink
-    latest_seasonal_dir = seasonal_dir / "latest"
-    if latest_seasonal_dir.exists():
-        logger.debug(f"Removing existing symlink: {latest_seasonal_dir}")
-        latest_seasonal_dir.unlink()
-    logger.info(f"Creating symlink: {latest_seasonal_dir} -> {seasonal_dir_path}")
-    latest_seasonal_dir.symlink_to(seasonal_dir_path)
+    reconcile(Layout(symlinks={seasonal_dir / "latest": seasonal_dir_path}))
 
     # todo: link to ~/code dir as well?
     logger.info("Seasonal folder setup complete")
@@ -238,7 +299,7 @@ def setup_seasonal_folder(dt: datetime = None):
 # - contexts (libs, dev, etc)
 
 
-def setup_symlinks_dir():
+def setup_symlinks_dir(dry_run: bool = False) -> Plan:
     links_to_create = {
         # 1) seasonal
         # 2) examples
@@ -258,13 +319,11 @@ def setup_symlinks_dir():
         # "projects": projects_dir,
         # "experiments": experiments_dir,
     }
-    for link_name, target_path in links_to_create.items():
-        link_path = settings.symlinks_dir / link_name
-        if link_path.exists():
-            logger.debug(f"Link {link_path} already existed. Re-creating")
-            link_path.unlink()
-        logger.info(f"Creating symlink: {link_path} -> {target_path}")
-        link_path.symlink_to(target_path)
+    layout = Layout(
+        symlinks={settings.symlinks_dir / link_name: target_path for link_name, target_path in links_to_create.items()}
+    )
+    # only missing / outdated links are touched, dangling ones are reported
+    return reconcile(layout, dry_run)
 
 
 # endregion idea 6 - set up ~/code dir - softlinks to key locations
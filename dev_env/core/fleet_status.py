@@ -0,0 +1,179 @@
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from loguru import logger
+
+from dev_env.core.repo_discovery import Settings, discover_local_projects, get_repo_cache, read_head_sha
+
+
+@dataclass
+class RepoStatus:
+    path: str
+    branch: Optional[str] = None  # None - detached HEAD
+    upstream: Optional[str] = None
+    ahead: int = 0
+    behind: int = 0
+    staged: int = 0
+    modified: int = 0
+    untracked: int = 0
+    conflicts: int = 0
+    last_commit_ts: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def dirty(self) -> int:
+        return self.staged + self.modified + self.untracked + self.conflicts
+
+    @property
+    def needs_attention(self) -> bool:
+        return bool(self.dirty or self.ahead or self.behind or self.error)
+
+
+def parse_porcelain_v2(path: str, output: str) -> RepoStatus:
+    """Parse `git status --porcelain=v2 --branch`"""
+    status = RepoStatus(path)
+    for line in output.splitlines():
+        if line.startswith("# branch.head "):
+            head = line[len("# branch.head ") :]
+            status.branch = None if head == "(detached)" else head
+        elif line.startswith("# branch.upstream "):
+            status.upstream = line[len("# branch.upstream ") :]
+        elif line.startswith("# branch.ab "):
+            ahead, behind = line[len("# branch.ab ") :].split()
+            status.ahead, status.behind = int(ahead), -int(behind)
+        elif line.startswith(("1 ", "2 ")):
+            xy = line[2:4]
+            status.staged += xy[0] != "."
+            status.modified += xy[1] != "."
+        elif line.startswith("u "):
+            status.conflicts += 1
+        elif line.startswith("? "):
+            status.untracked += 1
+    return status
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_status_key(repo_path: Path) -> List:
+    """
+    What the status depends on, from a few stats - no git call.
+    Index mtime (staging, and git refreshes it on every status), HEAD (commits, checkouts),
+    FETCH_HEAD mtime (ahead / behind after a fetch) and the worktree root mtime (top-level files).
+    """
+    git_dir = repo_path / ".git"
+    return [
+        _mtime_ns(git_dir / "index"),
+        read_head_sha(repo_path),
+        _mtime_ns(git_dir / "FETCH_HEAD"),
+        _mtime_ns(repo_path),
+    ]
+
+
+def get_repo_status(repo_path: Path) -> Tuple[List, RepoStatus]:
+    """Run git status on the repo. Returns (status key, status)"""
+    result = subprocess.run(
+        ["git", "-C", str(repo_path), "status", "--porcelain=v2", "--branch"], capture_output=True, text=True
+    )
+    if result.returncode:
+        return get_status_key(repo_path), RepoStatus(str(repo_path), error=result.stderr.strip())
+    status = parse_porcelain_v2(str(repo_path), result.stdout)
+    last_commit = subprocess.run(
+        ["git", "-C", str(repo_path), "log", "-1", "--format=%ct"], capture_output=True, text=True
+    ).stdout.strip()
+    status.last_commit_ts = int(last_commit) if last_commit else None
+    # after the status - it may have refreshed the index
+    return get_status_key(repo_path), status
+
+
+def collect_fleet_status(
+    repos: List[Path] = None, workers: int = None, refresh: bool = False
+) -> List[RepoStatus]:
+    """
+    Status of all local repos. Repos whose status key is unchanged are served from the inventory store,
+    the rest are checked with a bounded pool of `git status` calls.
+    Args:
+        repos: repos to check. If None - the discovered repo inventory
+        workers: max parallel git calls. If None - settings.status_workers
+        refresh: ignore the cached statuses
+    """
+    settings = Settings()
+    if repos is None:
+        repos, _authors = discover_local_projects()
+    store = get_repo_cache(settings).store
+
+    cached = {} if refresh else store.get_statuses(str(repo) for repo in repos)
+    statuses = {}
+    to_check = []
+    for repo in repos:
+        entry = cached.get(str(repo))
+        if (
+            entry
+            and time.time() - entry["updated_at"] < settings.status_cache_max_age
+            and entry["key"] == get_status_key(repo)
+        ):
+            statuses[str(repo)] = RepoStatus(**entry["status"])
+        else:
+            to_check.append(repo)
+
+    logger.debug(f"Status of {len(statuses)} repos is cached, checking {len(to_check)}")
+    if to_check:
+        with ThreadPoolExecutor(max_workers=workers or settings.status_workers) as pool:
+            results = dict(zip(to_check, pool.map(get_repo_status, to_check)))
+        store.put_statuses({str(repo): (key, asdict(status)) for repo, (key, status) in results.items()})
+        statuses.update((str(repo), status) for repo, (_key, status) in results.items())
+
+    return [statuses[str(repo)] for repo in repos]
+
+
+def format_age(ts: Optional[int], now: float = None) -> str:
+    if ts is None:
+        return "-"
+    seconds = max(0, (now or time.time()) - ts)
+    for unit, size in [("y", 365 * 86400), ("mo", 30 * 86400), ("d", 86400), ("h", 3600), ("m", 60)]:
+        if seconds >= size:
+            return f"{int(seconds // size)}{unit}"
+    return "now"
+
+
+SORT_KEYS = {
+    "name": lambda s: s.path,
+    "dirty": lambda s: (-s.dirty, s.path),
+    "ahead": lambda s: (-s.ahead, s.path),
+    "behind": lambda s: (-s.behind, s.path),
+    "age": lambda s: (-(s.last_commit_ts or 0), s.path),  # most recent first
+}
+
+
+def format_status_table(statuses: List[RepoStatus], sort: str = "name", reverse: bool = False) -> str:
+    """Plain text table of the statuses, sorted by one of SORT_KEYS"""
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key: {sort}. Available: {list(SORT_KEYS)}")
+    home = str(Path.home())
+    rows = [("REPO", "BRANCH", "DIRTY", "AHEAD", "BEHIND", "LAST COMMIT")]
+    for status in sorted(statuses, key=SORT_KEYS[sort], reverse=reverse):
+        path = "~" + status.path[len(home) :] if status.path.startswith(home + os.sep) else status.path
+        if status.error:
+            rows.append((path, "error: " + status.error.splitlines()[0], "", "", "", ""))
+            continue
+        rows.append(
+            (
+                path,
+                status.branch or "(detached)",
+                str(status.dirty or ""),
+                str(status.ahead or ""),
+                str(status.behind or ""),
+                format_age(status.last_commit_ts),
+            )
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
@@ -1,20 +1,31 @@
+import threading
 import time
 import traceback
 from functools import lru_cache
 from pathlib import Path
-from typing import Union
+from queue import Queue
+from typing import Iterator, Union
 
 from dotenv import load_dotenv
 from git import Repo
-from github import Github
+from github import Github, UnknownObjectException
 from github.Repository import Repository
 from loguru import logger
 from pydantic_settings import BaseSettings
 
+from dev_env.core.github_gateway import install_github_gateway
+from dev_env.core.http_cache import install_http_cache
+from dev_env.core.checkout_index import CheckoutIndex
 from dev_env.core.constants import experiments_dir, projects_dir, archive_dir
+from dev_env.core.mirrors import update_mirror
+from dev_env.core.repo_index import RepoIndex
+from dev_env.core.repo_updates import CLONE_POLICIES
 from dev_env.core.settings import settings
+from dev_env.core.sync_engine import SyncLimits
 from dev_env.setup.setup_shell_profiles_and_env import git_pull_with_fetch
 
+install_http_cache()
+install_github_gateway()
 github_client = Github(settings.github_api_token.get_secret_value())
 
 
@@ -23,6 +34,100 @@ def get_all_repos() -> list[Repository]:
     return list(github_client.get_user().get_repos())
 
 
+def iter_all_repos() -> Iterator[Repository]:
+    """
+    Same as get_all_repos(), but yields repos page by page as they are downloaded,
+    so that work on the first repos can start before the whole listing is fetched.
+    """
+    if get_all_repos.cache_info().currsize:
+        yield from get_all_repos()
+        return
+    yield from github_client.get_user().get_repos()
+
+
+@lru_cache
+def get_user_login() -> str:
+    return github_client.get_user().login
+
+
+def iter_account_repos(account: str) -> Iterator[Repository]:
+    """
+    Repos of a single user / org, filtered on the github side - only the wanted repos cross the wire.
+    Same visibility as get_all_repos(): own repos, org repos, and repos of other users we collaborate on.
+    """
+    user = github_client.get_user()
+    if account == get_user_login():
+        yield from user.get_repos(affiliation="owner")
+        return
+    try:
+        org = github_client.get_organization(account)
+    except UnknownObjectException:  # not an org - another user
+        for repo in user.get_repos(affiliation="collaborator"):
+            if repo.owner.login == account:
+                yield repo
+        return
+    yield from org.get_repos(type="all")
+
+
+def iter_allowed_repos(accounts: list[str] = None) -> Iterator[Repository]:
+    """
+    Repos of all accounts_to_clone_from - listed per account concurrently, merged and deduplicated.
+    """
+    if accounts is None:
+        accounts = settings.accounts_to_clone_from
+    queue = Queue()
+    done = object()
+
+    def list_account(account):
+        try:
+            for repo in iter_account_repos(account):
+                queue.put(repo)
+        except Exception as e:
+            logger.error(f"Failed to list repos of {account}: {e}")
+        finally:
+            queue.put(done)
+
+    for account in accounts:
+        threading.Thread(target=list_account, args=(account,), daemon=True).start()
+
+    seen = set()
+    finished = 0
+    while finished < len(accounts):
+        repo = queue.get()
+        if repo is done:
+            finished += 1
+            continue
+        if repo.full_name in seen:
+            continue
+        seen.add(repo.full_name)
+        yield repo
+
+
+_repo_index: RepoIndex = None
+_repo_index_lock = threading.Lock()
+
+
+def get_repo_index() -> RepoIndex:
+    """
+    Index over get_all_repos() for O(1) lookups.
+    Built once, then updated incrementally whenever the cached listing changes.
+    """
+    global _repo_index
+    repos = get_all_repos()
+    with _repo_index_lock:
+        if _repo_index is None:
+            _repo_index = RepoIndex(repos, user_login=get_user_login())
+        elif _repo_index.source is not repos:
+            _repo_index.update(repos)
+    return _repo_index
+
+
+def refresh_repos() -> RepoIndex:
+    """Re-fetch the repo listing (cheap with http cache - 304s for unchanged pages) and update the index"""
+    get_all_repos.cache_clear()
+    return get_repo_index()
+
+
 def check_repo_allowed(repo: Repository):
     full_repo_name = repo.full_name
 
@@ -32,7 +137,14 @@ def check_repo_allowed(repo: Repository):
     return True
 
 
-def check_repo_cloned(repo: Repository):
+def check_repo_cloned(repo: Repository, checkout_index: CheckoutIndex = None):
+    """
+    Find local checkout of the repo.
+    Pass a CheckoutIndex when checking many repos - it is built in one pass and covers all project dirs.
+    """
+    if checkout_index is not None:
+        return checkout_index.find(repo)
+
     repo_name = repo.name
     folders_to_check = [
         experiments_dir,
@@ -73,39 +185,41 @@ def get_repo(repo_key: str):
     """
     if isinstance(repo_key, (Repository, Repo)):
         return repo_key
+    index = get_repo_index()
     if any([keyword in repo_key for keyword in url_keywords]):  # url
-        repo = None
-        candidates = [r for r in get_all_repos() if r.clone_url == repo_key]
-        if len(candidates) == 1:
-            repo = candidates[0]
+        repo = index.find_by_url(repo_key)
 
         parsed_name = parse_repo_name_from_url(repo_key)
         if parsed_name:
             if repo and repo.full_name != parsed_name:
                 logger.warning(f"Repo {repo} parsed to {parsed_name} but full name is different")
             if repo is None:
-                repo = github_client.get_repo(parsed_name)
+                repo = index.get(parsed_name) or github_client.get_repo(parsed_name)
     elif "/" in repo_key:  # full name
-        repo = github_client.get_repo(repo_key)
+        repo = index.get(repo_key) or github_client.get_repo(repo_key)
     else:  # just name
-        candidates = [r for r in get_all_repos() if r.name == repo_key]
-        user_name = github_client.get_user().login
-        # logger.info(f"User name: {user_name}")
-        # sort candidates, putting user's repos first
-        candidates = sorted(candidates, key=lambda x: x.owner.login == user_name, reverse=True)
+        # candidates are sorted with user's repos first
+        candidates = index.find_by_name(repo_key)
         if len(candidates) == 1:
             repo = candidates[0]
         elif len(candidates) > 1:
             print(f"Found {len(candidates)} candidates for {repo_key}: {candidates}")
             repo = candidates[0]
         else:
-            print(f"Found no candidates for {repo_key} in {user_name}")
+            print(f"Found no candidates for {repo_key} in {index.user_login}")
             repo = None
     return repo
 
 
 def clone_repo(
-    repo: Union[str, Repository, Repo], target_dir: Path, repo_name: str = None, pull_if_exists: bool = True
+    repo: Union[str, Repository, Repo],
+    target_dir: Path,
+    repo_name: str = None,
+    pull_if_exists: bool = True,
+    limits: SyncLimits = None,
+    policy: str = "full",
+    use_mirror: bool = None,
+    dissociate: bool = None,
 ):
     """
     Clone repo from github to target_dir
@@ -114,7 +228,20 @@ def clone_repo(
         target_dir (Path): target directory.
         repo_name (str): target dir name. If None, use repo name.
         pull_if_exists (bool): if True, pull repo if exists.
+        limits (SyncLimits): concurrency caps shared between parallel clones.
+        policy (str): one of CLONE_POLICIES - partial / shallow clones for rarely used repos.
+        use_mirror (bool): clone with --reference to the local mirror. If None, use settings.use_mirrors.
+        dissociate (bool): copy objects from the mirror (--dissociate). If None, use settings.mirror_dissociate.
     """
+    if policy not in CLONE_POLICIES:
+        raise ValueError(f"Invalid clone policy: {policy}. Available policies: {list(CLONE_POLICIES)}")
+    if use_mirror is None:
+        # mirrors hold everything - they would defeat the point of partial / shallow clones
+        use_mirror = settings.use_mirrors and policy == "full"
+    if dissociate is None:
+        dissociate = settings.mirror_dissociate
+    if limits is None:
+        limits = SyncLimits()
 
     repo = get_repo(repo)
     if repo_name is None:
@@ -146,8 +273,22 @@ def clone_repo(
 
     # todo: will this work with private repos?
     # somehow it worked in notebook -
+    clone_options = dict(CLONE_POLICIES[policy])
+    if use_mirror:
+        # objects come from the local mirror, github is only asked for what the mirror doesn't have
+        try:
+            mirror_path = update_mirror(repo.clone_url, repo.full_name, limits)
+            clone_options.update(reference=str(mirror_path), dissociate=dissociate)
+        except Exception as e:
+            logger.warning(f"Failed to update mirror for {repo.full_name}, cloning without it: {e}")
+
+    # clone (network) and checkout (disk) are separate steps so that they can be capped separately
     try:
-        local_repo = Repo.clone_from(repo.clone_url, target_dir)
+        with limits.network():
+            local_repo = Repo.clone_from(repo.clone_url, target_dir, no_checkout=True, **clone_options)
+        if local_repo.head.is_valid():  # empty repos have nothing to check out
+            with limits.disk():
+                local_repo.git.checkout("HEAD")
     except Exception as e:
         logger.error(f"Failed to clone {repo.clone_url} to {target_dir}: {e}")
         return None
@@ -193,10 +334,10 @@ def create_repo_from_template(name, template_name):
         templates = list(get_github_template_names())
         raise ValueError(f"Invalid template name: {template_name}. Available templates: {templates}")
     # check if the repo already exists
-    if name in [repo.name for repo in get_all_repos()]:
+    if get_repo_index().has_name(name):
         raise ValueError(f"Repository already exists: https://github.com/{repo.full_name}")
 
-    username = github_client.get_user().login
+    username = get_user_login()
     github_client._Github__requester.requestJsonAndCheck(
         "POST",
         f"/repos/{repo.full_name}/generate",
@@ -204,6 +345,7 @@ def create_repo_from_template(name, template_name):
     )
     url = f"https://github.com/{username}/{name}"
     logger.debug(f"Repository created: {url}")
+    refresh_repos()  # so that get_repo / has_name lookups see the new repo
     # return the repo link ?
     return url
 
@@ -0,0 +1,136 @@
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Optional
+
+from loguru import logger
+
+from dev_env.core.http_cache import CachingConnectionMixin, inject_connection_classes
+from dev_env.core.settings import settings
+
+
+@dataclass
+class ApiMetrics:
+    requests: int = 0  # requests actually sent to github
+    cache_hits: int = 0  # served from the http cache without a request
+    not_modified: int = 0  # 304s - revalidated, free in terms of rate limit
+    retries: int = 0  # rate limited and retried
+    wait_time: float = 0.0  # seconds spent waiting for the rate limiter
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take a token, blocking until one is available. Returns time waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class GithubGateway:
+    """
+    Shared throttle for all github api calls of the process.
+    - token bucket for concurrent callers
+    - reads X-RateLimit-Remaining / Reset and slows down (or pauses everyone) as the limit runs out
+    - respects Retry-After of secondary rate limits and retries
+    """
+
+    def __init__(self, rate: float = 10, burst: int = 20, max_retries: int = 3, low_watermark: int = 100):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.low_watermark = low_watermark
+        self.metrics = ApiMetrics()
+        self._blocked_until = 0.0  # time.time() until which nobody sends requests
+        self._lock = threading.Lock()
+
+    def record(self, metric: str, value=1):
+        with self._lock:
+            setattr(self.metrics, metric, getattr(self.metrics, metric) + value)
+
+    def send(self, send_fn: Callable):
+        """Send a request through the gateway. send_fn() -> response with .status, .getheaders() and .read()"""
+        for attempt in range(self.max_retries + 1):
+            self._wait()
+            response = send_fn()
+            self.record("requests")
+            headers = {k.lower(): v for k, v in response.getheaders()}
+            self._observe(headers)
+
+            delay = self._get_retry_delay(response, headers)
+            if delay is None or attempt == self.max_retries:
+                return response
+            logger.warning(f"Github rate limit hit, retrying in {delay:.0f}s")
+            self.record("retries")
+            self._block_for(delay)
+        return response
+
+    def _wait(self):
+        waited = self.bucket.acquire()
+        with self._lock:
+            pause = self._blocked_until - time.time()
+        if pause > 0:
+            time.sleep(pause)
+            waited += pause
+        if waited:
+            self.record("wait_time", waited)
+
+    def _block_for(self, delay: float):
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.time() + delay)
+
+    def _observe(self, headers: Dict[str, str]):
+        """Spread the remaining requests evenly until reset once we get close to the limit"""
+        if "x-ratelimit-remaining" not in headers or "x-ratelimit-reset" not in headers:
+            return
+        remaining = int(headers["x-ratelimit-remaining"])
+        reset_in = max(0.0, int(headers["x-ratelimit-reset"]) - time.time())
+        if remaining == 0:
+            self._block_for(reset_in)
+        elif remaining < self.low_watermark:
+            self._block_for(reset_in / remaining)
+
+    @staticmethod
+    def _get_retry_delay(response, headers: Dict[str, str]) -> Optional[float]:
+        if response.status not in (403, 429):
+            return None
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+        if headers.get("x-ratelimit-remaining") == "0" and "x-ratelimit-reset" in headers:
+            return max(1.0, int(headers["x-ratelimit-reset"]) - time.time())
+        if "secondary rate limit" in str(response.read()).lower():
+            return 60.0
+        return None  # a normal 403 - permissions
+
+
+def install_github_gateway(gateway: GithubGateway = None) -> GithubGateway:
+    """
+    Route all PyGithub requests of the process through the gateway.
+    Has to be called before the Github client is created.
+    """
+    if gateway is None:
+        gateway = GithubGateway(rate=settings.github_api_rate, burst=settings.github_api_burst)
+    CachingConnectionMixin.gateway = gateway
+    inject_connection_classes()
+    return gateway
+
+
+def get_api_metrics() -> Dict:
+    gateway = CachingConnectionMixin.gateway
+    return asdict(gateway.metrics) if gateway else {}
@@ -0,0 +1,354 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from github.Requester import (
+    HTTPRequestsConnectionClass,
+    HTTPSRequestsConnectionClass,
+    Requester,
+    RequestsResponse,
+)
+from loguru import logger
+
+from dev_env.core.settings import settings
+
+if TYPE_CHECKING:
+    from dev_env.core.github_gateway import GithubGateway
+
+# headers that describe the current request, not the cached content - taken from the fresh 304 response
+LIVE_HEADERS = ["x-ratelimit-limit", "x-ratelimit-remaining", "x-ratelimit-reset", "x-ratelimit-used", "date"]
+
+
+class OfflineCacheMiss(ConnectionError):
+    pass
+
+
+def get_affected_paths(url: str) -> List[str]:
+    """
+    Cached paths a write (POST / PUT / PATCH / DELETE) to url can change. "<path>/*" - the path and everything
+    under it, else - just the path.
+    The resource with its sub-resources, its parent collection, and for repos - the repo listings.
+    """
+    path = urlsplit(url).path.rstrip("/")
+    api_prefix = "/api/v3" if path.startswith("/api/v3/") else ""  # github enterprise
+    parts = path[len(api_prefix) :].strip("/").split("/")
+    affected = [f"{path}/*", path.rsplit("/", 1)[0]]
+    if parts[0] == "repos" and len(parts) >= 3:
+        owner, name = parts[1], parts[2]
+        # a new repo from a template, a renamed / deleted repo - the listings change
+        related = [f"/repos/{owner}/{name}/*", "/user/repos", f"/users/{owner}/repos", f"/orgs/{owner}/repos"]
+        affected += [api_prefix + p for p in related]
+    elif parts[0] == "orgs" and parts[2:3] == ["repos"]:
+        affected.append(api_prefix + "/user/repos")
+    return sorted({p for p in affected if p})
+
+
+def _matches(path: str, pattern: str) -> bool:
+    if pattern.endswith("/*"):
+        return path == pattern[:-2] or path.startswith(pattern[:-1])
+    return path == pattern
+
+
+def get_key_path(key: str) -> str:
+    """Url path (no query) of a cache key made by HttpCache.make_key"""
+    url = key[key.index("/") : key.rindex("|")]
+    return urlsplit(url).path.rstrip("/")
+
+
+class HttpCache:
+    """
+    On-disk cache of GET responses, one json file per url.
+    Stores ETag / Last-Modified, so that stale entries are revalidated with a conditional request
+    (304 responses don't count against the github rate limit).
+    Writes through the cache invalidate the affected paths (see get_affected_paths) - entries validated before
+    the write are revalidated on the next read, even within the ttl. Shared between processes via invalidations.json.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        ttl: int = 300,
+        max_age_days: int = 30,
+        max_size_mb: int = 200,
+        offline: bool = False,
+    ):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.ttl = ttl
+        self.max_age = max_age_days * 24 * 3600
+        self.max_size = max_size_mb * 1024 * 1024
+        self.offline = offline
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._puts = 0
+        self._lock = threading.Lock()
+        self.invalidations_path = self.cache_dir / "invalidations.json"
+        self._invalidations: Dict[str, float] = {}  # path pattern -> time of the last write affecting it
+        self._invalidations_mtime = None
+
+    @staticmethod
+    def make_key(host: str, port: int, url: str, headers: Dict[str, str]) -> str:
+        # different tokens see different data - never mix them up
+        auth = (headers or {}).get("Authorization", "")
+        auth_hash = hashlib.sha256(auth.encode()).hexdigest()[:16]
+        return f"{host}:{port}{url}|{auth_hash}"
+
+    def _entry_path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self._entry_path(key)
+        try:
+            return json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to read http cache entry {path}: {e}")
+            return None
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry["validated_at"] < self.ttl and not self.is_invalidated(entry)
+
+    # region invalidation
+    def _load_invalidations(self) -> Dict[str, float]:
+        """Invalidations of all processes, re-read only when the file changed"""
+        try:
+            mtime = self.invalidations_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return self._invalidations
+        if mtime != self._invalidations_mtime:
+            try:
+                self._invalidations = json.loads(self.invalidations_path.read_text())
+                self._invalidations_mtime = mtime
+            except Exception as e:
+                logger.warning(f"Failed to read http cache invalidations: {e}")
+        return self._invalidations
+
+    def is_invalidated(self, entry: Dict) -> bool:
+        """Entry was validated before a write that affects its path"""
+        path = get_key_path(entry["key"])
+        for pattern, written_at in self._load_invalidations().items():
+            if written_at >= entry["validated_at"] and _matches(path, pattern):
+                return True
+        return False
+
+    def invalidate(self, url: str):
+        """Mark the cached paths affected by a write to url as stale"""
+        now = time.time()
+        with self._lock:
+            invalidations = dict(self._load_invalidations())
+            # older invalidations don't matter - everything validated before them is past the ttl anyway
+            invalidations = {path: ts for path, ts in invalidations.items() if now - ts < self.ttl}
+            invalidations.update((path, now) for path in get_affected_paths(url))
+            self._invalidations = invalidations
+            tmp_path = self.invalidations_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                tmp_path.write_text(json.dumps(invalidations))
+                os.replace(tmp_path, self.invalidations_path)
+                self._invalidations_mtime = self.invalidations_path.stat().st_mtime_ns
+            except Exception as e:
+                logger.warning(f"Failed to write http cache invalidations: {e}")
+
+    # endregion invalidation
+
+    def put(self, key: str, status: int, headers: Dict[str, str], body: str):
+        headers = {k.lower(): v for k, v in headers.items()}
+        entry = {
+            "key": key,
+            "status": status,
+            "headers": headers,
+            "body": body,
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "validated_at": time.time(),
+        }
+        self._write(key, entry)
+        with self._lock:
+            self._puts += 1
+            evict = self._puts % 100 == 0
+        if evict:
+            self.evict()
+
+    def touch(self, key: str, entry: Dict):
+        """Mark entry as just revalidated (after a 304)"""
+        entry["validated_at"] = time.time()
+        self._write(key, entry)
+
+    def _write(self, key: str, entry: Dict):
+        path = self._entry_path(key)
+        path.parent.mkdir(exist_ok=True)
+        # write + rename, so that concurrent readers never see a half-written entry
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(entry))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write http cache entry {path}: {e}")
+
+    def evict(self):
+        """Remove entries older than max_age, then the least recently validated until under max_size"""
+        entries = []
+        total_size = 0
+        now = time.time()
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        entries.sort()
+        removed = 0
+        for _mtime, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
+            removed += 1
+        if removed:
+            logger.debug(f"Evicted {removed} http cache entries")
+
+
+class CachedResponse:
+    # mimic RequestsResponse
+    def __init__(self, entry: Dict, live_headers: Dict[str, str] = None):
+        self.status = entry["status"]
+        self.headers = dict(entry["headers"])
+        self.headers.update(live_headers or {})
+        self.body = entry["body"]
+
+    def getheaders(self):
+        return self.headers.items()
+
+    def read(self) -> str:
+        return self.body
+
+    def raise_for_status(self):
+        pass
+
+
+class CachingConnectionMixin:
+    """
+    Serves GET requests of a PyGithub connection class from the HttpCache.
+    Requests that do go to github are passed through the GithubGateway throttle, if installed.
+    """
+
+    cache: Optional[HttpCache] = None
+    gateway: Optional["GithubGateway"] = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # PyGithub calls request() and then getresponse() on a shared connection - keep the pair per thread
+        self._pending = threading.local()
+
+    def request(self, verb, url, input, headers, stream=False):
+        self._pending.args = (verb, url, input, dict(headers or {}), stream)
+
+    def getresponse(self):
+        verb, url, input, headers, stream = self._pending.args
+        cache = self.cache
+        if cache is None or stream:
+            return self._send(verb, url, input, headers, stream)
+        if verb.upper() != "GET":
+            try:
+                return self._send(verb, url, input, headers, stream)
+            finally:
+                # even a failed write may have gone through - cached reads of it are revalidated
+                cache.invalidate(url)
+
+        key = cache.make_key(self.host, self.port, url, headers)
+        entry = cache.get(key)
+        if entry is not None and (cache.offline or cache.is_fresh(entry)):
+            self._record("cache_hits")
+            return CachedResponse(entry)
+        if cache.offline:
+            raise OfflineCacheMiss(f"Offline mode: no cached response for {url}")
+
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self._send(verb, url, input, headers, stream)
+        if response.status == 304 and entry is not None:
+            cache.touch(key, entry)
+            self._record("not_modified")
+            live_headers = {k.lower(): v for k, v in response.getheaders() if k.lower() in LIVE_HEADERS}
+            return CachedResponse(entry, live_headers)
+        if response.status == 200:
+            cache.put(key, response.status, dict(response.getheaders()), response.read())
+        return response
+
+    def _record(self, metric: str):
+        if self.gateway is not None:
+            self.gateway.record(metric)
+
+    def _send(self, verb, url, input, headers, stream):
+        if self.gateway is not None:
+            return self.gateway.send(lambda: self._send_raw(verb, url, input, headers, stream))
+        return self._send_raw(verb, url, input, headers, stream)
+
+    def _send_raw(self, verb, url, input, headers, stream):
+        r = getattr(self.session, verb.lower())(
+            f"{self.protocol}://{self.host}:{self.port}{url}",
+            headers=headers,
+            data=input,
+            timeout=self.timeout,
+            verify=self.verify,
+            allow_redirects=False,
+            stream=stream,
+        )
+        return RequestsResponse(r)
+
+
+class CachingHTTPConnection(CachingConnectionMixin, HTTPRequestsConnectionClass):
+    pass
+
+
+class CachingHTTPSConnection(CachingConnectionMixin, HTTPSRequestsConnectionClass):
+    pass
+
+
+def get_http_cache() -> HttpCache:
+    return HttpCache(
+        settings.env_dir / "cache" / "http",
+        ttl=settings.http_cache_ttl_seconds,
+        max_age_days=settings.http_cache_max_age_days,
+        max_size_mb=settings.http_cache_max_size_mb,
+        offline=settings.offline,
+    )
+
+
+def install_http_cache(cache: HttpCache = None) -> HttpCache:
+    """
+    Route all PyGithub requests through the cache.
+    Has to be called before the Github client is created.
+    """
+    if cache is None:
+        cache = get_http_cache()
+    cache.evict()
+    CachingConnectionMixin.cache = cache
+    inject_connection_classes()
+    return cache
+
+
+def inject_connection_classes():
+    Requester.injectConnectionClasses(CachingHTTPConnection, CachingHTTPSConnection)
+    # injectConnectionClasses disables connection reuse (meant for tests) - we want keep-alive
+    Requester._Requester__persist = True
+
+
+def set_offline(offline: bool = True):
+    """Serve everything from the cache, stale or not, without touching the network"""
+    settings.offline = offline
+    if CachingConnectionMixin.cache is not None:
+        CachingConnectionMixin.cache.offline = offline
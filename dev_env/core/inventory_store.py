@@ -0,0 +1,257 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from loguru import logger
+
+from dev_env.core.author_index import NGRAM_SIZE, get_ngrams, normalize_identity
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    path TEXT PRIMARY KEY,
+    info TEXT NOT NULL,  -- json, enrichment results
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS authors (
+    path TEXT NOT NULL REFERENCES repos(path) ON DELETE CASCADE,
+    identity TEXT NOT NULL,  -- normalized name or email
+    kind TEXT NOT NULL,  -- 'name' or 'email'
+    PRIMARY KEY (path, identity, kind)
+);
+CREATE INDEX IF NOT EXISTS authors_identity ON authors(identity);
+CREATE TABLE IF NOT EXISTS author_ngrams (
+    ngram TEXT NOT NULL,  -- trigram of an identity - substring search, see find_repos_by_author
+    identity TEXT NOT NULL,
+    PRIMARY KEY (ngram, identity)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    state TEXT NOT NULL  -- json, scan state from iter_git_repos
+);
+CREATE TABLE IF NOT EXISTS status (
+    path TEXT PRIMARY KEY,
+    key TEXT NOT NULL,  -- json, what the status was computed for - see fleet_status.get_status_key
+    status TEXT NOT NULL,  -- json
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL  -- json
+);
+"""
+
+
+class InventoryStore:
+    """
+    SQLite (WAL) store of the local repo inventory.
+    Every write is a transaction - concurrent readers (daily job, hooks manager, cli)
+    always see a consistent state, and can query a subset without loading everything.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path).expanduser().resolve()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # one connection per thread - sqlite connections are not shared between threads
+        self._local = threading.local()
+        self.conn.executescript(SCHEMA)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # region repos
+    def upsert_repo(self, path: str, info: Dict):
+        """Insert or replace one repo with its authors - atomically"""
+        authors = info.get("authors") or {}
+        rows = [(path, normalize_identity(name), "name") for name in authors.get("authors", []) if name.strip()]
+        rows += [(path, normalize_identity(email), "email") for email in authors.get("emails", []) if email.strip()]
+        ngram_rows = [(ngram, identity) for identity in {row[1] for row in rows} for ngram in get_ngrams(identity)]
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO repos (path, info, updated_at) VALUES (?, ?, ?)",
+                (path, json.dumps(info), time.time()),
+            )
+            conn.execute("DELETE FROM authors WHERE path = ?", (path,))
+            conn.executemany("INSERT OR IGNORE INTO authors (path, identity, kind) VALUES (?, ?, ?)", rows)
+            conn.executemany("INSERT OR IGNORE INTO author_ngrams (ngram, identity) VALUES (?, ?)", ngram_rows)
+
+    def remove_repos(self, paths: Iterable[str]):
+        with self.transaction() as conn:
+            conn.executemany("DELETE FROM repos WHERE path = ?", [(p,) for p in paths])
+            # ngrams of identities no repo has anymore
+            conn.execute(
+                "DELETE FROM author_ngrams WHERE NOT EXISTS "
+                "(SELECT 1 FROM authors WHERE authors.identity = author_ngrams.identity)"
+            )
+
+    def get_repo(self, path: str) -> Optional[Dict]:
+        row = self.conn.execute("SELECT info FROM repos WHERE path = ?", (path,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_repos(self, paths: Iterable[str] = None, prefix: str = None) -> Dict[str, Dict]:
+        """
+        Info of the selected repos, keyed by path.
+        Args:
+            paths: only these repos. If None - all
+            prefix: only repos under this dir (ignored if paths are given)
+        """
+        query = "SELECT path, info FROM repos"
+        if paths is not None:
+            result = {}
+            paths = list(paths)
+            # sqlite limits the number of query parameters
+            for i in range(0, len(paths), 500):
+                chunk = paths[i : i + 500]
+                rows = self.conn.execute(f"{query} WHERE path IN ({','.join('?' * len(chunk))})", chunk)
+                result.update((path, json.loads(info)) for path, info in rows)
+            return result
+        params = []
+        if prefix is not None:
+            query += " WHERE path >= ? AND path < ?"
+            prefix = prefix.rstrip("/") + "/"
+            params = [prefix, prefix[:-1] + "0"]  # '0' sorts right after '/'
+        rows = self.conn.execute(query + " ORDER BY path", params)
+        return {path: json.loads(info) for path, info in rows}
+
+    def list_repo_paths(self) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT path FROM repos ORDER BY path")]
+
+    def find_repos_by_identity(self, identity: str) -> List[str]:
+        """Repos with an author with exactly this name or email (case-insensitive)"""
+        rows = self.conn.execute(
+            "SELECT DISTINCT path FROM authors WHERE identity = ? ORDER BY path", (identity.strip().lower(),)
+        )
+        return [row[0] for row in rows]
+
+    def find_repos_by_author(self, patterns: Iterable[str]) -> Set[str]:
+        """
+        Repos with an author whose name or email contains any of the patterns (case-insensitive).
+        Candidates come from the author_ngrams table - only identities sharing all trigrams of a pattern are checked.
+        """
+        repos = set()
+        for pattern in patterns:
+            pattern = normalize_identity(pattern)
+            if len(pattern) < NGRAM_SIZE:
+                # too short for trigrams - scan the identities
+                rows = self.conn.execute("SELECT DISTINCT path FROM authors WHERE instr(identity, ?) > 0", (pattern,))
+                repos.update(row[0] for row in rows)
+                continue
+            ngrams = sorted(get_ngrams(pattern))
+            candidates = self.conn.execute(
+                f"SELECT identity FROM author_ngrams WHERE ngram IN ({','.join('?' * len(ngrams))}) "
+                "GROUP BY identity HAVING COUNT(*) = ?",
+                [*ngrams, len(ngrams)],
+            )
+            identities = [identity for (identity,) in candidates if pattern in identity]
+            for i in range(0, len(identities), 500):
+                chunk = identities[i : i + 500]
+                rows = self.conn.execute(
+                    f"SELECT DISTINCT path FROM authors WHERE identity IN ({','.join('?' * len(chunk))})", chunk
+                )
+                repos.update(row[0] for row in rows)
+        return repos
+
+    def get_authors_map(self, paths: Iterable[str] = None) -> Dict[str, List[str]]:
+        """repo path -> author names"""
+        authors_map = {path: ["Unknown"] for path in (paths if paths is not None else self.list_repo_paths())}
+        for path, info in self.get_repos(authors_map.keys()).items():
+            authors = info.get("authors")
+            authors_map[path] = authors["authors"] if authors else ["Unknown"]
+        return authors_map
+
+    # endregion repos
+
+    # region dirs
+    def load_dirs(self) -> Dict[str, Dict]:
+        return {path: json.loads(state) for path, state in self.conn.execute("SELECT path, state FROM dirs")}
+
+    def replace_dirs(self, dirs: Dict[str, Dict]):
+        """Replace the whole dir scan state"""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM dirs")
+            conn.executemany(
+                "INSERT INTO dirs (path, state) VALUES (?, ?)", [(p, json.dumps(s)) for p, s in dirs.items()]
+            )
+
+    # endregion dirs
+
+    # region status
+    def get_statuses(self, paths: Iterable[str]) -> Dict[str, Dict]:
+        """path -> {"key": ..., "status": ..., "updated_at": ...} for the paths that have a cached status"""
+        result = {}
+        paths = list(paths)
+        for i in range(0, len(paths), 500):
+            chunk = paths[i : i + 500]
+            rows = self.conn.execute(
+                f"SELECT path, key, status, updated_at FROM status WHERE path IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for path, key, status, updated_at in rows:
+                result[path] = {"key": json.loads(key), "status": json.loads(status), "updated_at": updated_at}
+        return result
+
+    def put_statuses(self, statuses: Dict[str, tuple]):
+        """Save path -> (key, status) in one transaction"""
+        now = time.time()
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO status (path, key, status, updated_at) VALUES (?, ?, ?, ?)",
+                [(path, json.dumps(key), json.dumps(status), now) for path, (key, status) in statuses.items()],
+            )
+
+    # endregion status
+
+    # region meta
+    def get_meta(self, key: str, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key: str, value):
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    # endregion meta
+
+    def export_json(self, json_path: Path):
+        """Write the inventory in the legacy repo_discovery.json layout - atomically"""
+        json_path = Path(json_path).expanduser().resolve()
+        repo_info = self.get_repos()
+        data = {
+            "timestamp": self.get_meta("timestamp"),
+            "repos": list(repo_info),
+            "authors": self.get_authors_map(repo_info.keys()),
+            "repo_info": repo_info,
+            "dirs": self.load_dirs(),
+        }
+        tmp_path = json_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data, indent=2))
+        tmp_path.replace(json_path)
+        logger.debug(f"Inventory exported to {json_path}")
@@ -0,0 +1,273 @@
+"""
+Background watcher that keeps the repo inventory live (Linux only).
+
+inotify watches every scanned dir under projects_root_dirs. Creation, deletion and renames
+of .git dirs (and of whole dirs containing repos) are applied to the InventoryStore right away.
+Commits, branch switches and remote changes in known repos are picked up on the heartbeat.
+While the watcher runs, discover_local_projects() is a pure read of the store.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, Optional
+
+from loguru import logger
+
+from dev_env.core.repo_discovery import (
+    ENRICH_KEY,
+    WATCHER_META_KEY,
+    Settings,
+    enrich_repo,
+    get_enrich_key,
+    get_repo_cache,
+    get_root_paths,
+    scan_local_projects,
+)
+
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_ONLYDIR
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class Inotify:
+    """Minimal ctypes binding of the linux inotify api"""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def rm_watch(self, wd: int):
+        self._libc.inotify_rm_watch(self.fd, wd)  # fails harmlessly if the kernel already dropped it
+
+    def read_events(self, timeout: float):
+        """Yield (wd, mask, name) of the pending events, waiting up to timeout seconds for the first one"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            yield wd, mask, name
+
+    def close(self):
+        os.close(self.fd)
+
+
+class InventoryWatcher:
+    """
+    Keeps the repo inventory in sync with the filesystem.
+    Dirs are watched down to the repos (and inside them, if discover_nested_repos is set),
+    ignored dirs (discovery_ignore_dirs) are not watched.
+    """
+
+    def __init__(self, settings: Settings = None, settle_delay: float = 1.0):
+        self.settings = settings or Settings()
+        self.cache = get_repo_cache(self.settings)
+        self.roots = get_root_paths(self.settings)
+        # new repos are enriched once they settle - `git clone` / `git init` are still writing .git
+        self.settle_delay = settle_delay
+        self.inotify: Optional[Inotify] = None
+        self.watches: Dict[int, str] = {}  # wd -> dir path
+        self.pending: Dict[str, float] = {}  # new repo path -> time of the last event
+
+    # region watches
+    def watch_tree(self, root: str):
+        """Watch root and all dirs under it, queue the repos found there for enrichment"""
+        nested = self.settings.discover_nested_repos
+        stack = [root]
+        while stack:
+            dir_path = stack.pop()
+            # watch before listing - nothing created in between is missed
+            self._add_watch(dir_path)
+            try:
+                with os.scandir(dir_path) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            # same rule as the scan: submodules have a .git file, they only count in nested mode
+            if any(e.name == ".git" and (nested or e.is_dir(follow_symlinks=False)) for e in entries):
+                self.pending[dir_path] = time.monotonic()
+                if not nested:
+                    continue  # the repo dir itself is watched - for .git deletion, not its content
+            for entry in entries:
+                if entry.name != ".git" and entry.is_dir(follow_symlinks=False) and not self._is_ignored(entry.name):
+                    stack.append(entry.path)
+
+    def _add_watch(self, dir_path: str):
+        try:
+            wd = self.inotify.add_watch(dir_path)
+        except OSError as e:
+            logger.warning(f"Can't watch {dir_path}: {e}")  # ENOSPC - raise fs.inotify.max_user_watches
+            return
+        self.watches[wd] = dir_path
+
+    def unwatch_tree(self, root: str):
+        for wd, dir_path in list(self.watches.items()):
+            if dir_path == root or dir_path.startswith(root + os.sep):
+                self.inotify.rm_watch(wd)
+                del self.watches[wd]
+
+    def _is_ignored(self, name: str) -> bool:
+        return any(fnmatch(name, pattern) for pattern in self.settings.discovery_ignore_dirs)
+
+    # endregion watches
+
+    # region inventory
+    def remove_tree(self, root: str):
+        """Drop all repos at or under root from the inventory"""
+        store = self.cache.store
+        removed = list(store.get_repos(paths=[root])) + list(store.get_repos(prefix=root))
+        for path in [p for p in self.pending if p == root or p.startswith(root + os.sep)]:
+            del self.pending[path]
+        if removed:
+            logger.info(f"Repos removed: {removed}")
+            store.remove_repos(removed)
+
+    def process_pending(self, force: bool = False):
+        """Enrich and store the new repos that have settled"""
+        now = time.monotonic()
+        for path, last_event in list(self.pending.items()):
+            if not force and now - last_event < self.settle_delay:
+                continue
+            del self.pending[path]
+            if not os.path.exists(os.path.join(path, ".git")):
+                continue
+            prev = self.cache.store.get_repo(path)
+            info = enrich_repo(Path(path), self.settings.discovery_enrichers, prev)
+            self.cache.upsert_repo(Path(path), info)
+            if prev is None:
+                logger.info(f"Repo added: {path}")
+
+    def handle_event(self, wd: int, mask: int, name: str):
+        dir_path = self.watches.get(wd)
+        if mask & IN_IGNORED:
+            self.watches.pop(wd, None)
+            return
+        if dir_path is None or not mask & IN_ISDIR:
+            return
+        path = os.path.join(dir_path, name)
+
+        if name == ".git":
+            if not self.settings.discover_nested_repos:
+                # the dir became a repo / stopped being one - its content is now outside / part of the walk
+                self.remove_tree(dir_path)
+                self.unwatch_tree(dir_path)
+                self.watch_tree(dir_path)
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                self.pending[dir_path] = time.monotonic()
+            else:
+                self.remove_tree(dir_path)
+            return
+        if self._is_ignored(name):
+            return
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            self.unwatch_tree(path)
+            self.remove_tree(path)
+        elif mask & (IN_CREATE | IN_MOVED_TO):
+            self.watch_tree(path)
+
+    def refresh_changed(self):
+        """Re-enrich known repos whose enrich key changed - new commits, branch switch, new remote"""
+        for path, prev in self.cache.store.get_repos().items():
+            if path in self.pending or not os.path.exists(os.path.join(path, ".git")):
+                continue
+            key = get_enrich_key(Path(path))
+            if prev.get(ENRICH_KEY) == key:
+                continue
+            logger.debug(f"Repo changed: {path}")
+            self.cache.upsert_repo(Path(path), enrich_repo(Path(path), self.settings.discovery_enrichers, prev, key))
+
+    def rescan(self):
+        """
+        Watch the roots and scan them. Also after lost events - watches are re-added for dirs created in the meantime.
+        """
+        # watches first - nothing created during the scan is missed
+        for root in self.roots:
+            if root.exists():
+                self.watch_tree(str(root))
+        self.pending.clear()  # the scan below enriches everything found so far
+        scan_local_projects(use_cache=True, settings=self.settings, cache=self.cache)
+
+    def heartbeat(self):
+        self.refresh_changed()
+        self.cache.store.set_meta(
+            WATCHER_META_KEY,
+            {"pid": os.getpid(), "heartbeat": time.time(), "roots": [str(root) for root in self.roots]},
+        )
+
+    # endregion inventory
+
+    def run(self, stop_event: threading.Event = None):
+        """
+        Bring the inventory up to date with a scan, then watch until stop_event is set (or forever).
+        """
+        stop_event = stop_event or threading.Event()
+        self.inotify = Inotify()
+        try:
+            for root in self.roots:
+                if not root.exists():
+                    logger.warning(f"Directory {root} does not exist, not watching")
+            self.rescan()
+            logger.info(f"Watching {len(self.watches)} dirs for repo changes")
+
+            last_heartbeat = 0.0
+            while not stop_event.is_set():
+                if time.monotonic() - last_heartbeat > self.settings.inventory_watcher_heartbeat_interval:
+                    self.heartbeat()
+                    last_heartbeat = time.monotonic()
+                timeout = self.settle_delay if self.pending else 1.0
+                for wd, mask, name in self.inotify.read_events(timeout):
+                    if mask & IN_Q_OVERFLOW:
+                        logger.warning("inotify queue overflow, rescanning")
+                        self.rescan()
+                        continue
+                    self.handle_event(wd, mask, name)
+                self.process_pending()
+        finally:
+            self.cache.store.set_meta(WATCHER_META_KEY, None)
+            self.inotify.close()
+
+
+def run_inventory_watcher():
+    InventoryWatcher().run()
+
+
+if __name__ == "__main__":
+    run_inventory_watcher()
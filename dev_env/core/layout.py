@@ -0,0 +1,150 @@
+import os
+import stat
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+
+@dataclass
+class Layout:
+    """
+    Desired state of a workspace: dirs that must exist and symlinks (link path -> target).
+    Only the declared paths are looked at - everything else on disk is left alone.
+    """
+
+    dirs: List[Path] = field(default_factory=list)
+    symlinks: Dict[Path, Path] = field(default_factory=dict)
+
+    def add_dir(self, path: Path) -> "Layout":
+        self.dirs.append(Path(path))
+        return self
+
+    def add_symlink(self, link_path: Path, target: Path) -> "Layout":
+        self.symlinks[Path(link_path)] = Path(target)
+        return self
+
+
+class OpType(str, Enum):
+    MKDIR = "mkdir"
+    SYMLINK = "symlink"
+    RELINK = "relink"  # replace a symlink pointing elsewhere
+
+
+@dataclass
+class Op:
+    type: OpType
+    path: Path
+    target: Optional[Path] = None
+
+    def __str__(self):
+        if self.type == OpType.MKDIR:
+            return f"mkdir   {self.path}"
+        return f"{self.type.value:<7} {self.path} -> {self.target}"
+
+
+@dataclass
+class Plan:
+    ops: List[Op] = field(default_factory=list)
+    conflicts: List[str] = field(default_factory=list)  # declared paths occupied by something else - not touched
+    dangling: Dict[Path, Path] = field(default_factory=dict)  # declared links whose target does not exist
+
+    def __str__(self):
+        lines = [str(op) for op in self.ops] or ["nothing to do"]
+        lines += [f"conflict {conflict}" for conflict in self.conflicts]
+        lines += [f"dangling {path} -> {target}" for path, target in self.dangling.items()]
+        return "\n".join(lines)
+
+
+def collect_state(layout: Layout) -> Dict[Path, Optional[os.stat_result]]:
+    """lstat of every declared path and of the link parents, in one pass. None - missing."""
+    paths = set(layout.dirs) | set(layout.symlinks) | {link.parent for link in layout.symlinks}
+    state = {}
+    for path in paths:
+        try:
+            state[path] = os.lstat(path)
+        except FileNotFoundError:
+            state[path] = None
+    return state
+
+
+def _normalize_target(link_path: Path, target: Path) -> str:
+    """Relative link targets are relative to the link's dir"""
+    return os.path.normpath(os.path.join(link_path.parent, target))
+
+
+def _read_link(link_path: Path) -> str:
+    return _normalize_target(link_path, Path(os.readlink(link_path)))
+
+
+def make_plan(layout: Layout, state: Dict[Path, Optional[os.stat_result]]) -> Plan:
+    """Minimal list of operations that brings the disk from `state` to `layout`"""
+    plan = Plan()
+    planned_dirs = set()
+
+    def ensure_dir(path: Path) -> bool:
+        st = state.get(path)
+        if path in planned_dirs or (st is not None and stat.S_ISDIR(st.st_mode)):
+            return True
+        if st is None:
+            plan.ops.append(Op(OpType.MKDIR, path))
+            planned_dirs.add(path)
+            return True
+        if stat.S_ISLNK(st.st_mode) and path.is_dir():
+            return True  # symlink to a dir - good enough
+        plan.conflicts.append(f"{path} is not a dir")
+        return False
+
+    # parents first - mkdir creates them anyway, but the plan reads better
+    for path in sorted(set(layout.dirs), key=lambda p: len(p.parts)):
+        ensure_dir(path)
+
+    for link_path, target in layout.symlinks.items():
+        st = state[link_path]
+        if st is None:
+            if not ensure_dir(link_path.parent):
+                continue
+            plan.ops.append(Op(OpType.SYMLINK, link_path, target))
+        elif not stat.S_ISLNK(st.st_mode):
+            plan.conflicts.append(f"{link_path} exists and is not a symlink")
+            continue
+        elif _read_link(link_path) != _normalize_target(link_path, target):
+            plan.ops.append(Op(OpType.RELINK, link_path, target))
+        target_path = _normalize_target(link_path, target)
+        if Path(target_path) not in planned_dirs and not os.path.exists(target_path):
+            plan.dangling[link_path] = target
+    return plan
+
+
+def apply_plan(plan: Plan):
+    for op in plan.ops:
+        logger.info(str(op))
+        if op.type == OpType.MKDIR:
+            op.path.mkdir(parents=True, exist_ok=True)
+        elif op.type == OpType.SYMLINK:
+            op.path.symlink_to(op.target)
+        elif op.type == OpType.RELINK:
+            # atomic - the link never disappears for concurrent readers
+            tmp_path = op.path.with_name(f".{op.path.name}.tmp")
+            if tmp_path.is_symlink():
+                tmp_path.unlink()
+            tmp_path.symlink_to(op.target)
+            os.replace(tmp_path, op.path)
+    for conflict in plan.conflicts:
+        logger.warning(f"Layout conflict, skipped: {conflict}")
+    for link_path, target in plan.dangling.items():
+        logger.warning(f"Dangling symlink: {link_path} -> {target}")
+
+
+def reconcile(layout: Layout, dry_run: bool = False) -> Plan:
+    """
+    Bring the disk in line with the layout. Re-running on an up-to-date disk only lstats the declared paths.
+    Args:
+        dry_run: only compute the plan - print it with str(plan)
+    """
+    plan = make_plan(layout, collect_state(layout))
+    if not dry_run:
+        apply_plan(plan)
+    return plan
@@ -0,0 +1,82 @@
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+from git import Repo
+from loguru import logger
+
+from dev_env.core.settings import settings
+from dev_env.core.sync_engine import SyncLimits
+
+mirrors_dir = settings.env_dir / "mirrors"
+
+# one lock per mirror - parallel clones of the same repo must not update it at the same time
+_mirror_locks = defaultdict(threading.Lock)
+_mirror_locks_lock = threading.Lock()
+
+# clones may borrow objects from the mirror (alternates) - the mirror must never drop any of them
+MIRROR_CONFIG = {"gc.auto": "0", "gc.pruneExpire": "never", "fetch.prune": "false"}
+
+
+def get_mirror_path(full_name: str) -> Path:
+    """~/.calmmage/mirrors/<owner>/<name>.git"""
+    owner, name = full_name.split("/")
+    return mirrors_dir / owner / f"{name}.git"
+
+
+def _configure_mirror(mirror: Repo):
+    with mirror.config_writer() as config:
+        for key, value in MIRROR_CONFIG.items():
+            section, option = key.split(".")
+            config.set_value(section, option, value)
+
+
+def _fetch_mirror(mirror_path: Path):
+    """Fetch new objects and refs. Refs deleted on the remote are kept - clones may still need their objects."""
+    mirror = Repo(mirror_path)
+    _configure_mirror(mirror)
+    mirror.git.remote("update")
+
+
+def update_mirror(clone_url: str, full_name: str, limits: SyncLimits = None) -> Path:
+    """
+    Create or incrementally update a bare mirror of the repo.
+    A mirror is fetched at most once per sync run - parallel clones of the same repo share it.
+    Args:
+        limits: shared by the whole sync run - remembers the mirrors already refreshed
+    Returns:
+        mirror path - to be used as `git clone --reference`.
+    """
+    if limits is None:
+        limits = SyncLimits()
+    mirror_path = get_mirror_path(full_name)
+    with _mirror_locks_lock:
+        lock = _mirror_locks[mirror_path]
+
+    with lock:
+        if mirror_path in limits.refreshed_mirrors:
+            return mirror_path
+        if (mirror_path / "HEAD").exists():
+            logger.debug(f"Updating mirror {mirror_path}")
+            with limits.network():
+                _fetch_mirror(mirror_path)
+        else:
+            logger.info(f"Creating mirror of {full_name} at {mirror_path}")
+            mirror_path.parent.mkdir(parents=True, exist_ok=True)
+            with limits.network():
+                _configure_mirror(Repo.clone_from(clone_url, mirror_path, mirror=True))
+        limits.refreshed_mirrors.add(mirror_path)
+    return mirror_path
+
+
+def list_mirrors() -> list[Path]:
+    return sorted(mirrors_dir.glob("*/*.git"))
+
+
+def update_all_mirrors():
+    for mirror_path in list_mirrors():
+        try:
+            logger.info(f"Updating mirror {mirror_path}")
+            _fetch_mirror(mirror_path)
+        except Exception as e:
+            logger.error(f"Failed to update mirror {mirror_path}: {e}")
@@ -1,17 +1,51 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Dict, Set, Optional
+from typing import Any, Callable, List, Dict, Set, Optional, Iterable, Iterator, Tuple, Union
 from datetime import datetime, timedelta
-import json
+from fnmatch import fnmatch
+import os
+import subprocess
+import time
 from loguru import logger
 from pydantic_settings import BaseSettings
-import git
-from tqdm.auto import tqdm
+
+from dev_env.core.author_index import AuthorIndex, StoredAuthorIndex, normalize_identity
+from dev_env.core.inventory_store import InventoryStore
 
 
 class Settings(BaseSettings):
     projects_root_dirs: List[str] = [".", "~/projects", "~/work"]
     repo_cache_ttl_days: int = 7  # cache validity period in days
+    repo_store_path: Path = Path("~/.calmmage/cache/repo_inventory.db")
+    export_repo_cache_json: bool = False  # also export the inventory to repo_cache_path
     repo_cache_path: Path = Path("~/.calmmage/cache/repo_discovery.json")
+    # dir names (fnmatch patterns) that are never scanned
+    discovery_ignore_dirs: List[str] = [
+        "node_modules",
+        ".venv",
+        "venv",
+        "__pycache__",
+        ".tox",
+        ".nox",
+        ".mypy_cache",
+        ".pytest_cache",
+        ".ruff_cache",
+        ".ipynb_checkpoints",
+        "*.egg-info",
+    ]
+    discover_nested_repos: bool = False  # also look inside repos - submodules, nested repos
+    discovery_progress_interval: float = 5.0  # seconds between progress reports
+    # enrichment of found repos - see ENRICHERS. size_on_disk walks the whole repo, so it is opt-in
+    discovery_enrichers: List[str] = ["authors", "default_branch", "remote_url", "last_commit_date"]
+    discovery_workers: int = os.cpu_count() or 4  # 1 - enrich in the main process
+    discovery_checkpoint_interval: float = 10.0  # seconds between cache saves during enrichment
+    # the inventory watcher (inventory_watcher.py) refreshes its heartbeat in the store this often
+    inventory_watcher_heartbeat_interval: float = 30.0
+    status_workers: int = 16  # parallel `git status` calls of the fleet status
+    # a cached status is reused while index mtime / HEAD / FETCH_HEAD are the same, but not longer than this -
+    # edits of tracked files don't touch the index until git looks at them
+    status_cache_max_age: float = 600.0
 
     class Config:
         env_file = ".env"
@@ -19,40 +53,60 @@ class Settings(BaseSettings):
 
 
 class RepoCache:
-    def __init__(self, cache_path: Path, ttl_days: int):
-        self.cache_path = cache_path.expanduser().resolve()
+    """
+    Repo inventory - backed by an InventoryStore (sqlite), repos are upserted one by one as they are enriched.
+    The json file is only an optional export for tools that want a plain file.
+    """
+
+    def __init__(self, store_path: Path, ttl_days: int, json_path: Optional[Path] = None):
+        self.store = InventoryStore(store_path)
         self.ttl = timedelta(days=ttl_days)
-        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.json_path = json_path
 
     def load(self) -> Optional[Dict]:
-        """Load cache if it exists and is not expired"""
-        if not self.cache_path.exists():
-            return None
-
+        """Load cache if it exists and the last full scan is not expired"""
         try:
-            data = json.loads(self.cache_path.read_text())
-            cached_time = datetime.fromisoformat(data["timestamp"])
-
-            if datetime.now() - cached_time > self.ttl:
+            timestamp = self.store.get_meta("timestamp")
+            if timestamp is None:
+                return None
+            if datetime.now() - datetime.fromisoformat(timestamp) > self.ttl:
                 logger.debug("Cache expired")
                 return None
 
-            return data
+            return {
+                "timestamp": timestamp,
+                "dirs": self.store.load_dirs(),
+                "repo_info": self.store.get_repos(),
+            }
         except Exception as e:
             logger.warning(f"Failed to load cache: {e}")
             return None
 
-    def save(self, repos: List[Path], authors_map: Dict[str, List[str]]):
-        """Save repository data to cache"""
-        cache_data = {
-            "timestamp": datetime.now().isoformat(),
-            "repos": [str(repo) for repo in repos],
-            "authors": authors_map,
-        }
-
+    def upsert_repo(self, repo: Path, info: Dict):
+        self.store.upsert_repo(str(repo), info)
+
+    def save(
+        self,
+        repos: Optional[List[Path]],
+        dirs: Optional[Dict[str, Dict]],
+        timestamp: str = None,
+    ):
+        """
+        Save the scan results. Repo info itself is saved with upsert_repo as it arrives.
+        Args:
+            repos: all repos found by a complete walk - the rest are removed. None - partial run, keep everything
+            dirs: per-dir scan state from iter_git_repos - for incremental rescans. None - keep the saved one
+            timestamp: time of the last full scan. If None - now
+        """
         try:
-            self.cache_path.write_text(json.dumps(cache_data, indent=2))
-            logger.debug(f"Cache saved to {self.cache_path}")
+            if repos is not None:
+                self.store.remove_repos(set(self.store.list_repo_paths()) - {str(repo) for repo in repos})
+            if dirs is not None:
+                self.store.replace_dirs(dirs)
+            self.store.set_meta("timestamp", timestamp or datetime.now().isoformat())
+            if self.json_path is not None:
+                self.store.export_json(self.json_path)
+            logger.debug(f"Cache saved to {self.store.db_path}")
         except Exception as e:
             logger.warning(f"Failed to save cache: {e}")
 
@@ -60,19 +114,450 @@ class RepoCache:
 def get_repo_authors(repo_path: Path) -> List[str]:
     """Get list of authors who contributed to the repository"""
     try:
-        repo = git.Repo(repo_path)
-        authors = set()
-        for commit in repo.iter_commits():
-            authors.add(commit.author.name)
-        return list(authors)
+        return sorted({name for name, _email in iter_commit_authors(repo_path)})
     except Exception as e:
         logger.warning(f"Failed to get authors for {repo_path}: {e}")
         return ["Unknown"]
 
 
+def iter_commit_authors(repo_path: Path, rev_range: str = "HEAD") -> Iterator[Tuple[str, str]]:
+    """Stream (name, email) of every commit in rev_range from `git log` - no python object per commit"""
+    cmd = ["git", "-C", str(repo_path), "log", "--format=%an%x00%ae", rev_range, "--"]
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, errors="replace") as proc:
+        for line in proc.stdout:
+            name, _, email = line.rstrip("\n").partition("\0")
+            yield name, email
+        stderr = proc.stderr.read()
+    if proc.returncode:
+        raise RuntimeError(f"git log failed in {repo_path}: {stderr.strip()}")
+
+
+def read_head_sha(repo_path: Path) -> Optional[str]:
+    """Resolve HEAD by reading .git files directly - cheaper than spawning git. None for an empty repo."""
+    git_dir = Path(repo_path) / ".git"
+    try:
+        head = (git_dir / "HEAD").read_text().strip()
+        if not head.startswith("ref: "):
+            return head  # detached HEAD
+        ref = head[len("ref: ") :]
+        ref_path = git_dir / ref
+        if ref_path.exists():
+            return ref_path.read_text().strip()
+        packed_refs = git_dir / "packed-refs"
+        if packed_refs.exists():
+            for line in packed_refs.read_text().splitlines():
+                if line.endswith(f" {ref}"):
+                    return line.split(" ")[0]
+        return None
+    except (NotADirectoryError, FileNotFoundError):
+        # .git is a file (worktree / submodule) - let git figure it out
+        result = subprocess.run(
+            ["git", "-C", str(repo_path), "rev-parse", "--verify", "-q", "HEAD"], capture_output=True, text=True
+        )
+        return result.stdout.strip() or None
+
+
+def _is_ancestor(repo_path: Path, old_sha: str, new_sha: str) -> bool:
+    result = subprocess.run(["git", "-C", str(repo_path), "merge-base", "--is-ancestor", old_sha, new_sha])
+    return result.returncode == 0
+
+
+def update_repo_authors(repo_path: Path, prev: Optional[Dict] = None) -> Dict:
+    """
+    Authors of the repo, cached by HEAD sha.
+    - same HEAD as cached: nothing to do
+    - new commits on top of cached HEAD: read only the commits in between
+    - history rewritten (cached HEAD is not an ancestor anymore): full rebuild
+    Returns:
+        {"head": sha, "authors": [names], "emails": [emails]}
+    """
+    head = read_head_sha(repo_path)
+    if head is None:
+        return {"head": None, "authors": [], "emails": []}
+    if prev and prev.get("head") == head:
+        return prev
+
+    if prev and prev.get("head") and _is_ancestor(repo_path, prev["head"], head):
+        rev_range = f"{prev['head']}..{head}"
+        authors, emails = set(prev["authors"]), set(prev["emails"])
+    else:
+        rev_range = head
+        authors, emails = set(), set()
+
+    for name, email in iter_commit_authors(repo_path, rev_range):
+        authors.add(name)
+        emails.add(email)
+    return {"head": head, "authors": sorted(authors), "emails": sorted(emails)}
+
+
+# Enrichers: (repo_path, previous value or None) -> value. Previous value allows incremental updates.
+ENRICHERS: Dict[str, Callable[[Path, Any], Any]] = {}
+# Enrichers whose value only depends on the enrich key - reused without a git call while the key is unchanged
+KEYED_ENRICHERS = set()
+ENRICH_KEY = "enrich_key"
+
+
+def enricher(name: str, keyed: bool = False):
+    """
+    Register a repo enricher under the name used in Settings.discovery_enrichers
+    Args:
+        keyed: the value only changes with HEAD, .git/config or origin/HEAD - see get_enrich_key
+    """
+
+    def decorator(func):
+        ENRICHERS[name] = func
+        if keyed:
+            KEYED_ENRICHERS.add(name)
+        return func
+
+    return decorator
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_enrich_key(repo_path: Path) -> List:
+    """
+    What the keyed enrichers depend on, from a few stats - no git call for a regular repo.
+    HEAD sha (commits), HEAD mtime (branch switch), .git/config (remotes) and origin/HEAD (default branch).
+    """
+    git_dir = repo_path / ".git"
+    return [
+        read_head_sha(repo_path),
+        _mtime_ns(git_dir / "HEAD"),
+        _mtime_ns(git_dir / "config"),
+        _mtime_ns(git_dir / "refs" / "remotes" / "origin" / "HEAD"),
+    ]
+
+
+def get_cached_info(enrichers: List[str], prev: Optional[Dict], key: List) -> Optional[Dict]:
+    """Info from the previous run, if all enrichers are keyed and the key is unchanged. Else None."""
+    if not prev or prev.get(ENRICH_KEY) != key:
+        return None
+    if not all(name in KEYED_ENRICHERS and name in prev for name in enrichers):
+        return None
+    return {ENRICH_KEY: key, **{name: prev[name] for name in enrichers}}
+
+
+def _git(repo_path: Path, *args) -> Optional[str]:
+    result = subprocess.run(["git", "-C", str(repo_path), *args], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
+
+
+@enricher("authors", keyed=True)
+def enrich_authors(repo_path: Path, prev: Optional[Dict]) -> Dict:
+    return update_repo_authors(repo_path, prev)
+
+
+@enricher("default_branch", keyed=True)
+def enrich_default_branch(repo_path: Path, prev=None) -> Optional[str]:
+    """Default branch of origin if known, else the current branch"""
+    remote_head = _git(repo_path, "symbolic-ref", "--short", "-q", "refs/remotes/origin/HEAD")
+    if remote_head:
+        return remote_head.removeprefix("origin/")
+    return _git(repo_path, "symbolic-ref", "--short", "-q", "HEAD")
+
+
+@enricher("remote_url", keyed=True)
+def enrich_remote_url(repo_path: Path, prev=None) -> Optional[str]:
+    return _git(repo_path, "config", "--get", "remote.origin.url")
+
+
+@enricher("last_commit_date", keyed=True)
+def enrich_last_commit_date(repo_path: Path, prev=None) -> Optional[str]:
+    """ISO date of the last commit on HEAD"""
+    return _git(repo_path, "log", "-1", "--format=%cI", "HEAD")
+
+
+@enricher("size_on_disk")
+def enrich_size_on_disk(repo_path: Path, prev=None) -> int:
+    """Bytes allocated on disk by the repo, including .git. Symlinks are not followed."""
+    total = 0
+    stack = [str(repo_path)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    st = entry.stat(follow_symlinks=False)
+                    total += st.st_blocks * 512 if hasattr(st, "st_blocks") else st.st_size
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        except OSError:
+            continue
+    return total
+
+
+def enrich_repo(repo_path: Path, enrichers: List[str], prev: Optional[Dict] = None, key: List = None) -> Dict:
+    """
+    Run the enrichers on one repo. Module-level so that it can be sent to a worker process.
+    Keyed enrichers reuse the previous value while the enrich key is unchanged.
+    A failing enricher is logged and left out - the rest of the info is still returned.
+    Args:
+        key: get_enrich_key of the repo, if already computed
+    """
+    prev = prev or {}
+    key = key if key is not None else get_enrich_key(repo_path)
+    unchanged = prev.get(ENRICH_KEY) == key
+    info = {ENRICH_KEY: key}
+    for name in enrichers:
+        if unchanged and name in KEYED_ENRICHERS and name in prev:
+            info[name] = prev[name]
+            continue
+        try:
+            info[name] = ENRICHERS[name](repo_path, prev.get(name))
+        except Exception as e:
+            logger.warning(f"Enricher {name} failed for {repo_path}: {e}")
+    return info
+
+
+def check_enrichers(enrichers: List[str]):
+    unknown = [name for name in enrichers if name not in ENRICHERS]
+    if unknown:
+        raise ValueError(f"Unknown enrichers: {unknown}. Available: {list(ENRICHERS)}")
+
+
+def iter_enriched_repos(
+    repos: Iterable[Path],
+    enrichers: List[str],
+    prev_info: Dict[str, Dict] = None,
+    workers: int = 4,
+) -> Iterator[Tuple[Path, Dict]]:
+    """
+    Enrich repos over a process pool, yielding (repo_path, info) as each one completes.
+    Repos are submitted while `repos` is still being iterated - enrichment overlaps with the walk.
+    Unchanged repos (same enrich key, keyed enrichers only) are answered from prev_info right away -
+    the pool is only started for the first repo that needs a git call.
+    Args:
+        repos: repo paths, can be a generator
+        enrichers: names of ENRICHERS to run
+        prev_info: info from the previous run, keyed by str(repo_path) - for incremental enrichers
+        workers: process count. 1 - run in the current process
+    """
+    check_enrichers(enrichers)
+    prev_info = prev_info or {}
+
+    if workers <= 1:
+        for path in repos:
+            prev, key = prev_info.get(str(path)), get_enrich_key(path)
+            yield path, get_cached_info(enrichers, prev, key) or enrich_repo(path, enrichers, prev, key)
+        return
+
+    pool = None
+    pending = {}
+    try:
+        for path in repos:
+            prev, key = prev_info.get(str(path)), get_enrich_key(path)
+            info = get_cached_info(enrichers, prev, key)
+            if info is not None:
+                yield path, info
+                continue
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=workers)
+            pending[pool.submit(enrich_repo, path, enrichers, prev, key)] = path
+            # hand out what is done while the walk goes on, and keep the backlog bounded
+            if len(pending) >= workers * 4:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            else:
+                done = [future for future in pending if future.done()]
+            for future in done:
+                yield pending.pop(future), future.result()
+        for future in as_completed(list(pending)):
+            yield pending.pop(future), future.result()
+    finally:
+        # on an early exit (error, KeyboardInterrupt, consumer stopped) - don't wait for the pending repos
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_git_repos(
+    root: Path,
+    ignore: Iterable[str] = (),
+    nested: bool = False,
+    progress_interval: float = 5.0,
+    prev_state: Dict[str, Dict] = None,
+    state: Dict[str, Dict] = None,
+) -> Iterator[Path]:
+    """
+    Walk root with os.scandir and yield git repositories as they are found.
+    Only the dirs still to be scanned are kept in memory - never a full list of paths.
+    Symlinks are never followed - a symlinked repo is found (once) through its real location.
+
+    Incremental mode: scan results of each dir are recorded in `state` (keyed by path, with mtime and inode).
+    On the next run pass them back as `prev_state` - a dir is only re-listed if its mtime / inode changed
+    (entries added, removed or renamed), and a known repo is validated with a single stat of its .git.
+
+    Args:
+        root: directory to scan
+        ignore: dir names (fnmatch patterns) to skip entirely
+        nested: keep descending into found repos (submodules, repos inside repos)
+        progress_interval: log scanned dirs/sec every that many seconds
+        prev_state: dir state from the previous run
+        state: dict to record the dir state of this run into
+    """
+    ignore = list(ignore)
+    prev_state = prev_state or {}
+    if state is None:
+        state = {}
+    stack = [str(root)]
+    scanned = reused = found = 0
+    start = last_report = time.monotonic()
+
+    while stack:
+        dir_path = stack.pop()
+        dir_state = _get_dir_state(dir_path, prev_state.get(dir_path), nested)
+        if dir_state is None:
+            try:
+                dir_state = _scan_dir(dir_path, nested)
+            except (PermissionError, FileNotFoundError, NotADirectoryError) as e:
+                logger.debug(f"Skipping {dir_path}: {e}")
+                continue
+            scanned += 1
+        else:
+            reused += 1
+        state[dir_path] = dir_state
+
+        if dir_state["is_repo"]:
+            found += 1
+            yield Path(dir_path)
+        if not dir_state["is_repo"] or nested:
+            subdirs = [name for name in dir_state["subdirs"] if not any(fnmatch(name, p) for p in ignore)]
+            # reversed - so that dirs are popped in alphabetical order
+            stack.extend(os.path.join(dir_path, name) for name in sorted(subdirs, reverse=True))
+
+        now = time.monotonic()
+        if now - last_report > progress_interval:
+            total = scanned + reused
+            logger.info(
+                f"Checked {total} dirs ({total / (now - start):.0f} dirs/sec, {reused} unchanged), found {found} repos"
+            )
+            last_report = now
+
+
+def _scan_dir(dir_path: str, nested: bool) -> Dict:
+    st = os.stat(dir_path)
+    subdirs = []
+    is_repo = False
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            if entry.name == ".git":
+                # submodules have a .git file pointing to the parent repo
+                is_repo = is_repo or entry.is_dir(follow_symlinks=False) or nested
+            elif entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.name)
+    return {"mtime_ns": st.st_mtime_ns, "ino": st.st_ino, "is_repo": is_repo, "subdirs": subdirs}
+
+
+def _get_dir_state(dir_path: str, prev: Optional[Dict], nested: bool) -> Optional[Dict]:
+    """Previous scan result of the dir if it is still valid, else None"""
+    if prev is None:
+        return None
+    if prev["is_repo"] and not nested:
+        # nothing inside a repo matters - just check it is still a repo
+        return prev if os.path.isdir(os.path.join(dir_path, ".git")) else None
+    try:
+        st = os.stat(dir_path)
+    except OSError:
+        return None
+    if st.st_mtime_ns == prev["mtime_ns"] and st.st_ino == prev["ino"]:
+        return prev
+    return None
+
+
+def get_repo_cache(settings: Settings = None) -> RepoCache:
+    if settings is None:
+        settings = Settings()
+    json_path = settings.repo_cache_path if settings.export_repo_cache_json else None
+    return RepoCache(settings.repo_store_path, settings.repo_cache_ttl_days, json_path)
+
+
+WATCHER_META_KEY = "watcher"
+
+
+def canonicalize_roots(root_dirs: Iterable[str]) -> List[Path]:
+    """
+    Resolve roots (symlinks, "~", "."), drop duplicates and roots nested inside another root -
+    each tree is walked once. Order of the remaining roots is kept.
+    """
+    resolved = []
+    for root_dir in root_dirs:
+        root_path = Path(root_dir).expanduser().resolve()
+        if root_path not in resolved:
+            resolved.append(root_path)
+    roots = []
+    for root_path in resolved:
+        outer = next((other for other in resolved if other != root_path and other in root_path.parents), None)
+        if outer is not None:
+            logger.debug(f"Skipping root {root_path} - it is inside {outer}")
+            continue
+        roots.append(root_path)
+    return roots
+
+
+def get_root_paths(settings: Settings) -> List[Path]:
+    return canonicalize_roots(settings.projects_root_dirs)
+
+
+def is_watcher_alive(cache: RepoCache, settings: Settings) -> bool:
+    """Whether an inventory watcher over the same roots is running and keeps the store up to date"""
+    watcher = cache.store.get_meta(WATCHER_META_KEY)
+    if not watcher:
+        return False
+    if time.time() - watcher["heartbeat"] > 2 * settings.inventory_watcher_heartbeat_interval:
+        return False
+    if watcher["roots"] != [str(root) for root in get_root_paths(settings)]:
+        return False
+    try:
+        os.kill(watcher["pid"], 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, but is not ours
+    return True
+
+
+@dataclass
+class LocalRepo:
+    path: Path
+    info: Dict = field(default_factory=dict)  # enrichment results, see ENRICHERS
+
+    @property
+    def authors(self) -> List[str]:
+        authors = self.info.get("authors")
+        return authors["authors"] if authors else ["Unknown"]
+
+    def matches_authors(self, patterns: List[str]) -> bool:
+        """Same matching as the author index - case-insensitive substrings of author names or emails"""
+        authors = self.info.get("authors") or {}
+        identities = [i.lower() for i in authors.get("authors", []) + authors.get("emails", [])]
+        return any(pattern.lower() in identity for pattern in patterns for identity in identities)
+
+
+def iter_local_projects(use_cache: bool = True) -> Iterator[LocalRepo]:
+    """
+    Yield local repos as soon as they are found and enriched - per-repo work can start before the scan is done.
+    If the inventory watcher is running, repos come straight from the store.
+    """
+    settings = Settings()
+    cache = get_repo_cache(settings)
+    if use_cache and is_watcher_alive(cache, settings):
+        logger.info("Inventory watcher is running, reading repos from the store")
+        for path, info in cache.store.get_repos().items():
+            yield LocalRepo(Path(path), info)
+        return
+    for path, info in iter_scanned_projects(use_cache, settings, cache):
+        yield LocalRepo(path, info)
+
+
 def discover_local_projects(use_cache: bool = True) -> tuple[List[Path], Dict[str, List[str]]]:
     """
     Discover all local git repositories in configured directories.
+    If the inventory watcher is running, this is just a read of the store.
 
     Args:
         use_cache: Whether to use cached results if available
@@ -81,43 +566,108 @@ def discover_local_projects(use_cache: bool = True) -> tuple[List[Path], Dict[st
         Tuple of (list of repository paths, dict mapping repo paths to authors)
     """
     settings = Settings()
-    cache = RepoCache(settings.repo_cache_path, settings.repo_cache_ttl_days)
-
-    # Try to load from cache first
-    if use_cache:
-        cached_data = cache.load()
-        if cached_data:
-            logger.info("Using cached repository data")
-            return ([Path(p) for p in cached_data["repos"]], cached_data["authors"])
-
+    cache = get_repo_cache(settings)
+    if use_cache and is_watcher_alive(cache, settings):
+        logger.info("Inventory watcher is running, reading repos from the store")
+        repos = cache.store.list_repo_paths()
+        return [Path(repo) for repo in repos], cache.store.get_authors_map(repos)
+    return scan_local_projects(use_cache, settings, cache)
+
+
+def scan_local_projects(
+    use_cache: bool = True, settings: Settings = None, cache: RepoCache = None
+) -> tuple[List[Path], Dict[str, List[str]]]:
+    """Walk the configured dirs (incrementally, if use_cache) and enrich the found repos"""
     discovered_repos = []
-    authors_map = {}
-
-    for root_dir in settings.projects_root_dirs:
-        root_path = Path(root_dir).expanduser().resolve()
-        logger.info(f"Scanning {root_path} for git repositories...")
+    repo_info = {
+        str(path): info for path, info in iter_scanned_projects(use_cache, settings, cache, discovered=discovered_repos)
+    }
+    return discovered_repos, get_authors_map(discovered_repos, repo_info)
 
-        if not root_path.exists():
-            logger.warning(f"Directory {root_path} does not exist, skipping...")
-            continue
 
-        # Walk through all subdirectories
-        for path in tqdm(list(root_path.rglob("*"))):
-            # Skip if not a directory or if it's inside .git
-            if not path.is_dir() or ".git" in path.parts:
+def iter_scanned_projects(
+    use_cache: bool = True, settings: Settings = None, cache: RepoCache = None, discovered: List[Path] = None
+) -> Iterator[Tuple[Path, Dict]]:
+    """
+    Walk the configured dirs (incrementally, if use_cache) and yield (repo_path, info) as each repo is enriched.
+    The inventory is saved when the generator is exhausted - or closed early, then as a partial run.
+    Args:
+        discovered: list to append the found repos to, in walk order
+    """
+    settings = settings or Settings()
+    cache = cache or get_repo_cache(settings)
+    check_enrichers(settings.discovery_enrichers)
+
+    # Cached dir state - only changed subtrees are re-walked
+    cached_data = cache.load() if use_cache else None
+    if cached_data:
+        logger.info("Using cached repository data, rescanning changed dirs")
+    else:
+        cached_data = {"timestamp": None, "repo_info": {}, "dirs": {}}
+
+    discovered_repos = discovered if discovered is not None else []
+    dirs_state = {}
+    repo_info = {}
+
+    def walk() -> Iterator[Path]:
+        # the same repo can be reachable from two roots (bind mounts, case-insensitive fs)
+        seen = set()
+        for root_path in get_root_paths(settings):
+            logger.info(f"Scanning {root_path} for git repositories...")
+
+            if not root_path.exists():
+                logger.warning(f"Directory {root_path} does not exist, skipping...")
                 continue
 
-            if is_git_repo(path):
-                discovered_repos.append(path)
-                authors_map[str(path)] = get_repo_authors(path)
+            for path in iter_git_repos(
+                root_path,
+                ignore=settings.discovery_ignore_dirs,
+                nested=settings.discover_nested_repos,
+                progress_interval=settings.discovery_progress_interval,
+                prev_state=cached_data["dirs"],
+                state=dirs_state,
+            ):
+                st = os.stat(path)
+                if (st.st_dev, st.st_ino) in seen:
+                    logger.debug(f"Skipping {path} - already found under another root")
+                    continue
+                seen.add((st.st_dev, st.st_ino))
                 logger.debug(f"Found git repository: {path}")
+                discovered_repos.append(path)
+                yield path
+
+    # Enrichment results are upserted into the store as they complete - a partial run still updates the inventory
+    complete = False
+    last_save = time.monotonic()
+    try:
+        for path, info in iter_enriched_repos(
+            walk(), settings.discovery_enrichers, cached_data["repo_info"], settings.discovery_workers
+        ):
+            repo_info[str(path)] = info
+            # unchanged repos are already in the store
+            if info != cached_data["repo_info"].get(str(path)):
+                cache.upsert_repo(path, info)
+            if time.monotonic() - last_save > settings.discovery_checkpoint_interval:
+                cache.save(None, None, cached_data["timestamp"])
+                last_save = time.monotonic()
+            yield path, info
+        complete = True
+    finally:
+        if complete:
+            cache.save(discovered_repos, dirs_state, cached_data["timestamp"])
+        else:
+            cache.save(None, None, cached_data["timestamp"])
 
     logger.info(f"Discovered {len(discovered_repos)} git repositories")
 
-    # Save to cache
-    cache.save(discovered_repos, authors_map)
 
-    return discovered_repos, authors_map
+def get_authors_map(repos: List[Path], repo_info: Dict[str, Dict]) -> Dict[str, List[str]]:
+    """repo path -> author names, from enrichment results. ["Unknown"] if authors were not collected."""
+    authors_map = {}
+    for path in repos:
+        authors = repo_info.get(str(path), {}).get("authors")
+        authors_map[str(path)] = authors["authors"] if authors else ["Unknown"]
+    return authors_map
 
 
 def get_repo_name(repo_path: Path) -> str:
@@ -130,11 +680,35 @@ def is_author_match(authors: List[str], patterns: List[str]) -> bool:
     return any(pattern in author for pattern in patterns for author in authors)
 
 
+def load_author_index(use_cache: bool = True) -> StoredAuthorIndex:
+    """Author index over the inventory store. Runs the discovery first if the store is empty (or not use_cache)."""
+    cache = get_repo_cache()
+    if not use_cache or cache.store.get_meta("timestamp") is None:
+        discover_local_projects(use_cache=use_cache)
+    return StoredAuthorIndex(cache.store)
+
+
 def filter_repos_by_author(
-    repos: List[Path], authors_map: Dict[str, List[str]], author_patterns: List[str]
+    repos: List[Path],
+    authors_map: Dict[str, List[str]],
+    author_patterns: List[str],
+    author_index: Union[AuthorIndex, StoredAuthorIndex] = None,
 ) -> List[Path]:
-    """Filter repositories by author patterns"""
-    return [repo for repo in repos if is_author_match(authors_map[str(repo)], author_patterns)]
+    """
+    Filter repositories by author patterns - case-insensitive substrings of author names or emails.
+    Args:
+        author_index: index to answer from, e.g. load_author_index() - built once, reused across calls.
+            If None - authors_map is scanned: for a one-off filter that is cheaper than building an index
+    """
+    if author_index is not None:
+        matched = author_index.find(author_patterns)
+        return [repo for repo in repos if str(repo) in matched]
+    patterns = [normalize_identity(pattern) for pattern in author_patterns]
+    return [
+        repo
+        for repo in repos
+        if is_author_match([normalize_identity(author) for author in authors_map.get(str(repo), [])], patterns)
+    ]
 
 
 if __name__ == "__main__":
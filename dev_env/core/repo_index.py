@@ -0,0 +1,93 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from github.Repository import Repository
+
+
+class RepoIndex:
+    """
+    Dict indexes over the github repo listing - build once, then every lookup is O(1).
+    Lookups by name return the authenticated user's own repos first.
+    """
+
+    def __init__(self, repos: Iterable[Repository] = (), user_login: str = None):
+        self.user_login = user_login
+        self.source = None  # the listing this index was last built from
+
+        self.by_full_name: Dict[str, Repository] = {}
+        self.by_name: Dict[str, List[Repository]] = defaultdict(list)
+        self.by_clone_url: Dict[str, Repository] = {}
+        self.by_ssh_url: Dict[str, Repository] = {}
+        self.by_owner: Dict[str, List[Repository]] = defaultdict(list)
+        self._versions: Dict[str, object] = {}
+
+        self.update(repos)
+
+    def update(self, repos: Iterable[Repository]):
+        """
+        Bring the index in sync with a new listing.
+        Only repos that were added, removed or changed (by updated_at / pushed_at) are re-indexed.
+        """
+        self.source = repos
+        seen = set()
+        for repo in repos:
+            seen.add(repo.full_name)
+            version = self._get_version(repo)
+            if repo.full_name in self.by_full_name:
+                if self._versions[repo.full_name] == version:
+                    continue
+                self._remove(self.by_full_name[repo.full_name])
+            self._add(repo, version)
+
+        for full_name in set(self.by_full_name) - seen:
+            self._remove(self.by_full_name[full_name])
+
+    @staticmethod
+    def _get_version(repo: Repository):
+        return getattr(repo, "updated_at", None), getattr(repo, "pushed_at", None)
+
+    def _add(self, repo: Repository, version):
+        self.by_full_name[repo.full_name] = repo
+        self._versions[repo.full_name] = version
+        self.by_clone_url[repo.clone_url] = repo
+        if getattr(repo, "ssh_url", None):
+            self.by_ssh_url[repo.ssh_url] = repo
+        self.by_owner[repo.owner.login].append(repo)
+
+        candidates = self.by_name[repo.name]
+        candidates.append(repo)
+        # stable sort - user's repos first, otherwise keep the listing order
+        candidates.sort(key=lambda x: x.owner.login == self.user_login, reverse=True)
+
+    def _remove(self, repo: Repository):
+        del self.by_full_name[repo.full_name]
+        del self._versions[repo.full_name]
+        self.by_clone_url.pop(repo.clone_url, None)
+        if getattr(repo, "ssh_url", None):
+            self.by_ssh_url.pop(repo.ssh_url, None)
+        self._discard(self.by_owner, repo.owner.login, repo)
+        self._discard(self.by_name, repo.name, repo)
+
+    @staticmethod
+    def _discard(index: Dict[str, List[Repository]], key: str, repo: Repository):
+        index[key] = [r for r in index[key] if r.full_name != repo.full_name]
+        if not index[key]:
+            del index[key]
+
+    def get(self, full_name: str) -> Optional[Repository]:
+        return self.by_full_name.get(full_name)
+
+    def find_by_name(self, name: str) -> List[Repository]:
+        return list(self.by_name.get(name, []))
+
+    def find_by_url(self, url: str) -> Optional[Repository]:
+        return self.by_clone_url.get(url) or self.by_ssh_url.get(url)
+
+    def find_by_owner(self, owner: str) -> List[Repository]:
+        return list(self.by_owner.get(owner, []))
+
+    def has_name(self, name: str) -> bool:
+        return name in self.by_name
+
+    def __len__(self):
+        return len(self.by_full_name)
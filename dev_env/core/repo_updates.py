@@ -0,0 +1,144 @@
+"""
+Updates of local clones: fetch precheck, pull, backfill of partial / shallow clones.
+Plain git - no github client needed.
+"""
+
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+
+from git import Git, GitCommandError, Repo
+from github.Repository import Repository
+from loguru import logger
+
+from dev_env.core.sync_engine import SyncLimits
+
+# extra `git clone` options for each clone policy
+CLONE_POLICIES = {
+    "full": {},
+    "blobless": {"filter": "blob:none"},  # full history, file contents downloaded on demand
+    "treeless": {"filter": "tree:0"},  # commits only, trees and blobs on demand
+    "shallow": {"depth": 1},  # latest commit only
+}
+
+
+# allowed difference between github and local clocks when comparing pushed_at to the last fetch time
+PUSHED_AT_MARGIN = timedelta(minutes=5)
+
+
+def remote_has_changes(local_repo: Repo, repo: Repository = None, limits: SyncLimits = None) -> bool:
+    """
+    Cheap check whether a fetch would bring anything new.
+    1) if github listing is available - compare repo.pushed_at to the last fetch time, no network at all
+    2) otherwise - compare branch tips from git ls-remote to local remote-tracking refs, one round-trip.
+        Tracking refs of branches deleted on the remote are ignored - they would never match
+    Only looks at origin. On any error assumes there are changes.
+    """
+    try:
+        fetch_head = Path(local_repo.git_dir) / "FETCH_HEAD"
+        if repo is not None and repo.pushed_at is not None and fetch_head.exists():
+            pushed_at = repo.pushed_at
+            if pushed_at.tzinfo is None:  # older PyGithub versions return naive utc datetimes
+                pushed_at = pushed_at.replace(tzinfo=timezone.utc)
+            last_fetch = datetime.fromtimestamp(fetch_head.stat().st_mtime, tz=timezone.utc)
+            return pushed_at > last_fetch - PUSHED_AT_MARGIN
+
+        if limits is None:
+            limits = SyncLimits()
+        with limits.network():
+            output = local_repo.git.ls_remote("--heads", "origin")
+        remote_tips = {}
+        for line in output.splitlines():
+            sha, ref = line.split("\t")
+            remote_tips[ref.removeprefix("refs/heads/")] = sha
+        local_tips = {
+            ref.remote_head: ref.commit.hexsha for ref in local_repo.remotes.origin.refs if ref.remote_head != "HEAD"
+        }
+        return any(local_tips.get(branch) != sha for branch, sha in remote_tips.items())
+    except Exception as e:
+        logger.debug(f"Precheck failed for {local_repo.working_tree_dir}, assuming changes: {e}")
+        return True
+
+
+def pull_repo(local_repo: Repo, limits: SyncLimits = None, fetch: bool = True) -> bool:
+    """
+    Fetch and merge updates for the given repository - same as git_pull_with_fetch,
+    but with fetch (network) and merge (disk) done under separate limits.
+    Args:
+        fetch (bool): if False, only merge what was fetched before (e.g. remote_has_changes found nothing new).
+    Returns:
+        bool: True if there were new commits to pull.
+    """
+    if limits is None:
+        limits = SyncLimits()
+    if fetch:
+        with limits.network():
+            local_repo.git.fetch("--all")
+
+    current_branch = local_repo.active_branch.name
+    local_commit = local_repo.head.commit
+    remote_commit = local_repo.refs[f"origin/{current_branch}"].commit
+    if local_commit == remote_commit:
+        return False
+
+    with limits.disk():
+        local_repo.git.merge(f"origin/{current_branch}")
+    return True
+
+
+def _get_config(local_repo: Repo, key: str):
+    try:
+        return local_repo.git.config("--get", key)
+    except GitCommandError:  # key not set
+        return None
+
+
+def _unset_config(local_repo: Repo, key: str):
+    try:
+        local_repo.git.config("--unset", key)
+    except GitCommandError as e:
+        if e.status != 5:  # 5 - key not set
+            raise
+
+
+@lru_cache
+def _git_supports_refetch() -> bool:
+    """`git fetch --refetch` is available since git 2.36"""
+    return Git().version_info >= (2, 36)
+
+
+def backfill_repo(local_repo: Repo, policy: str = "full", limits: SyncLimits = None):
+    """
+    Download what a shallow / partial clone is missing, so that it matches the (fuller) clone policy.
+    shallow -> anything else: fetch full history
+    blobless / treeless -> full: drop the filter and refetch all objects.
+        Before git 2.36 (no --refetch) only new fetches are unfiltered, old objects are still fetched on demand
+    """
+    if limits is None:
+        limits = SyncLimits()
+    git_dir = Path(local_repo.git_dir)
+    target_options = CLONE_POLICIES[policy]
+
+    if (git_dir / "shallow").exists() and "depth" not in target_options:
+        logger.info(f"Fetching full history for {local_repo.working_tree_dir}")
+        # shallow clones are single-branch - track all branches again
+        local_repo.git.config("remote.origin.fetch", "+refs/heads/*:refs/remotes/origin/*")
+        with limits.network():
+            local_repo.git.fetch("--unshallow", "origin")
+
+    partial_filter = _get_config(local_repo, "remote.origin.partialclonefilter")
+    if partial_filter and partial_filter != target_options.get("filter"):
+        # the promisor stays until everything is here - objects missing meanwhile are still fetched on demand
+        _unset_config(local_repo, "remote.origin.partialclonefilter")
+        if not _git_supports_refetch():
+            logger.warning(
+                f"git < 2.36 can't refetch: {local_repo.working_tree_dir} gets unfiltered fetches from now on, "
+                f"objects of the old history are fetched on demand"
+            )
+            with limits.network():
+                local_repo.git.fetch("origin")
+            return
+        logger.info(f"Fetching all objects for {local_repo.working_tree_dir} (was {partial_filter})")
+        with limits.network():
+            local_repo.git.fetch("--refetch", "origin")
+        _unset_config(local_repo, "remote.origin.promisor")
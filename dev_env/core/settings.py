@@ -30,6 +30,35 @@ class MySettings(BaseSettings):
         "calmmage",
         "engineering-friends",
     ]
+    # list repos of each account separately (server-side filter) instead of all repos visible to the token
+    list_repos_per_account: bool = True
+
+    # parallel clone / pull of all repos
+    clone_workers: int = 8
+    clone_network_concurrency: int = 8  # clone / fetch
+    clone_disk_concurrency: int = 4  # checkout / merge
+    sync_precheck: bool = True  # skip git fetch if the remote has nothing new
+    # how repos are cloned into each tier dir: full, blobless, treeless or shallow - see repo_updates.CLONE_POLICIES
+    clone_policies: dict[str, str] = {
+        "experiments": "full",
+        "projects": "full",
+        "archive": "blobless",
+    }
+
+    # on-disk cache of github api responses, see http_cache.py
+    http_cache_ttl_seconds: int = 300  # serve without revalidation for this long
+    http_cache_max_age_days: int = 30
+    http_cache_max_size_mb: int = 200
+    offline: bool = False  # serve stale cached data, never hit github api
+    # shared throttle for all github api calls, see github_gateway.py
+    github_api_rate: float = 10  # requests per second, on average
+    github_api_burst: int = 20
+
+    # local bare mirrors under env_dir / mirrors, used as `git clone --reference` - see mirrors.py
+    use_mirrors: bool = True
+    # copy objects from the mirror (--dissociate) instead of borrowing them via alternates.
+    # Borrowing saves disk - objects are stored once, in the mirror. Mirrors never gc / prune, so borrowed objects stay
+    mirror_dissociate: bool = False
 
     # structural_dirs: list[str] = [
     #     'seasonal',
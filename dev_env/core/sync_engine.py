@@ -0,0 +1,94 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+
+class SyncStatus(str, Enum):
+    CLONED = "cloned"
+    PULLED = "pulled"
+    UP_TO_DATE = "up-to-date"
+    FAILED = "failed"
+
+
+@dataclass
+class RepoSyncResult:
+    name: str
+    status: SyncStatus
+    path: Optional[Path] = None
+    duration: float = 0.0
+    error: Optional[str] = None
+    fetch_skipped: bool = False  # precheck found nothing new on the remote
+
+
+class SyncLimits:
+    """
+    Separate concurrency caps for the two kinds of git work.
+    network - clone / fetch (waiting on github)
+    disk - checkout / merge (writing the working tree)
+    One instance is shared by all repos of a sync run - it also remembers the mirrors refreshed during the run.
+    """
+
+    def __init__(self, network: int = 8, disk: int = 4):
+        self._network = threading.BoundedSemaphore(network)
+        self._disk = threading.BoundedSemaphore(disk)
+        self.refreshed_mirrors = set()  # updated under the per-mirror lock - see mirrors.update_mirror
+
+    @contextmanager
+    def network(self):
+        with self._network:
+            yield
+
+    @contextmanager
+    def disk(self):
+        with self._disk:
+            yield
+
+
+def run_parallel(
+    repos: Iterable, sync_fn: Callable[..., RepoSyncResult], workers: int = 8
+) -> List[RepoSyncResult]:
+    """
+    Run sync_fn for every repo on a bounded thread pool.
+    Args:
+        repos: iterable of repos - consumed lazily, work starts as soon as the first repo arrives.
+        sync_fn: callable(repo) -> RepoSyncResult. Should not raise.
+        workers: max number of repos processed at the same time.
+    Returns:
+        list of per-repo results, in completion order.
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # submitting while iterating - producing repos (e.g. paginating github listing) overlaps with the work
+        futures = {executor.submit(_timed, sync_fn, repo): repo for repo in repos}
+        for future in as_completed(futures):
+            result = future.result()
+            logger.debug(f"{result.name}: {result.status.value} in {result.duration:.1f}s")
+            results.append(result)
+    return results
+
+
+def _timed(sync_fn, repo) -> RepoSyncResult:
+    start = time.monotonic()
+    try:
+        result = sync_fn(repo)
+    except Exception as e:
+        result = RepoSyncResult(name=repo.name, status=SyncStatus.FAILED, error=str(e))
+    result.duration = time.monotonic() - start
+    return result
+
+
+def summarize(results: List[RepoSyncResult]) -> Dict[str, int]:
+    """Count results per status"""
+    summary = {status.value: 0 for status in SyncStatus}
+    for result in results:
+        summary[result.status.value] += 1
+    summary["fetch_skipped"] = sum(result.fetch_skipped for result in results)
+    summary["total"] = len(results)
+    return summary
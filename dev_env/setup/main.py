@@ -1,9 +1,9 @@
 from dev_env.core.ffs import create_dirs, clone_projects
 
 
-def setup():
+def setup(workers: int = None):
     create_dirs()
-    clone_projects()
+    clone_projects(workers=workers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,48 @@
+from pathlib import Path
+
+from dev_env.core.author_index import AuthorIndex
+from dev_env.core.repo_discovery import filter_repos_by_author
+
+
+def make_index():
+    return AuthorIndex(
+        {
+            "/projects/calmlib": ["Petr Lavrov", "petr@calmmage.com"],
+            "/projects/fork": ["Petr Lavrov", "Someone Else"],
+            "/projects/other": ["Someone Else", "someone@example.com"],
+        }
+    )
+
+
+def test_find_substring_case_insensitive():
+    index = make_index()
+
+    assert index.find(["lavrov"]) == {"/projects/calmlib", "/projects/fork"}
+    assert index.find(["CALMMAGE"]) == {"/projects/calmlib"}
+    assert index.find(["nobody"]) == set()
+
+
+def test_find_short_pattern():
+    index = make_index()
+
+    assert index.find(["@e"]) == {"/projects/other"}
+
+
+def test_add_replaces_and_remove_cleans_up():
+    index = make_index()
+
+    index.add("/projects/fork", ["Someone Else"])
+    assert index.find(["petr"]) == {"/projects/calmlib"}
+
+    index.remove("/projects/calmlib")
+    assert index.find(["petr"]) == set()
+    assert not any("petr" in identity for ids in index.by_ngram.values() for identity in ids)
+
+
+def test_filter_repos_by_author():
+    repos = [Path("/projects/calmlib"), Path("/projects/fork"), Path("/projects/other")]
+    authors_map = {str(repo): ids for repo, ids in zip(repos, [["Petr"], ["Petr", "Else"], ["Else"]])}
+
+    assert filter_repos_by_author(repos, authors_map, ["Petr"]) == repos[:2]
+    assert filter_repos_by_author(repos, authors_map, ["ELSE"]) == repos[1:]
+    assert filter_repos_by_author(repos, {}, ["lavrov"], make_index()) == repos[:2]
@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from old_dev_env.utils.backup_store import BackupStore
+
+
+@pytest.fixture
+def project(tmp_path):
+    project = tmp_path / "project"
+    (project / "src").mkdir(parents=True)
+    (project / "src" / "main.py").write_text("print('hello')")
+    (project / "data.bin").write_bytes(os.urandom(1000))
+    (project / "link").symlink_to("data.bin")
+    return project
+
+
+def test_backup_and_restore(tmp_path, project):
+    store = BackupStore(tmp_path / "backups")
+
+    backup_id = store.backup(project)
+
+    assert store.get_latest_backup(project) == backup_id
+    assert (store.get_snapshot_path(backup_id) / "src" / "main.py").read_text() == "print('hello')"
+    restored = store.restore(backup_id, tmp_path / "restored")
+    assert (restored / "data.bin").read_bytes() == (project / "data.bin").read_bytes()
+    assert os.readlink(restored / "link") == "data.bin"
+    (restored / "src" / "main.py").write_text("edited")  # restored files are independent of the store
+    assert (store.get_snapshot_path(backup_id) / "src" / "main.py").read_text() == "print('hello')"
+
+
+def test_unchanged_files_share_storage(tmp_path, project):
+    store = BackupStore(tmp_path / "backups")
+    first = store.backup(project)
+    (project / "src" / "main.py").write_text("print('changed')")
+
+    second = store.backup(project)
+
+    first_data = store.get_snapshot_path(first) / "data.bin"
+    second_data = store.get_snapshot_path(second) / "data.bin"
+    assert os.stat(first_data).st_ino == os.stat(second_data).st_ino
+    assert len(list(store.objects_dir.glob("*/*"))) == 3
+    assert [b["id"] for b in BackupStore(tmp_path / "backups").list_backups(project)] == [first, second]
+
+
+def test_delete_and_gc(tmp_path, project):
+    store = BackupStore(tmp_path / "backups")
+    first = store.backup(project)
+    (project / "src" / "main.py").write_text("print('changed')")
+    second = store.backup(project)
+
+    store.delete(first)
+
+    assert store.gc() == 1
+    assert store.get_latest_backup(project) == second
+    assert store.restore(second, tmp_path / "restored").joinpath("src", "main.py").read_text() == "print('changed')"
+
+
+def test_gc_keeps_objects_of_manifests(tmp_path, project):
+    store = BackupStore(tmp_path / "backups")
+    backup_id = store.backup(project)
+    # snapshot file copied instead of linked (EMLINK) - the object has a single link but is still used
+    snapshot_file = store.get_snapshot_path(backup_id) / "src" / "main.py"
+    snapshot_file.unlink()
+
+    assert store.gc() == 0
+    assert store.restore(backup_id, tmp_path / "restored").joinpath("src", "main.py").read_text() == "print('hello')"
+
+
+def test_backup_keeps_empty_dirs_and_skips_fifos(tmp_path, project):
+    (project / "logs" / "empty").mkdir(parents=True)
+    os.mkfifo(project / "pipe")
+    store = BackupStore(tmp_path / "backups")
+
+    backup_id = store.backup(project)
+
+    assert (store.get_snapshot_path(backup_id) / "logs" / "empty").is_dir()
+    restored = store.restore(backup_id, tmp_path / "restored")
+    assert (restored / "logs" / "empty").is_dir()
+    assert not (restored / "pipe").exists()
+
+
+def test_concurrent_stores_merge_index(tmp_path, project):
+    first_store = BackupStore(tmp_path / "backups")
+    second_store = BackupStore(tmp_path / "backups")
+
+    first = first_store.backup(project)
+    second = second_store.backup(project)
+
+    assert [b["id"] for b in first_store.list_backups(project)] == [first, second]
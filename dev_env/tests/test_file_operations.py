@@ -0,0 +1,74 @@
+import os
+
+from old_dev_env.utils.file_operations import copy_file, copy_tree, move_path
+
+
+def make_tree(root):
+    (root / "pkg" / "__pycache__").mkdir(parents=True)
+    (root / "pkg" / "__pycache__" / "mod.cpython-312.pyc").write_bytes(b"\0")
+    (root / "pkg" / "mod.py").write_text("print('hello')")
+    (root / ".venv").mkdir()
+    (root / ".venv" / "pyvenv.cfg").write_text("home = /usr")
+    (root / "README.md").write_text("readme")
+    (root / "link").symlink_to("README.md")
+    return root
+
+
+def test_copy_tree_ignores_and_copies_symlinks(tmp_path):
+    source = make_tree(tmp_path / "source")
+
+    stats = copy_tree(source, tmp_path / "dest")
+
+    dest = tmp_path / "dest"
+    assert (dest / "pkg" / "mod.py").read_text() == "print('hello')"
+    assert not (dest / "pkg" / "__pycache__").exists()
+    assert not (dest / ".venv").exists()
+    assert os.readlink(dest / "link") == "README.md"
+    assert stats.copied == 3
+    assert os.stat(dest / "README.md").st_mtime_ns == os.stat(source / "README.md").st_mtime_ns
+
+
+def test_copy_tree_skips_identical_files(tmp_path):
+    source = make_tree(tmp_path / "source")
+    dest = tmp_path / "dest"
+    copy_tree(source, dest)
+
+    (source / "README.md").write_text("changed")
+    (dest / "pkg" / "mod.py").touch()  # same content, different mtime
+    stats = copy_tree(source, dest, overwrite=True, ignore=[".venv", "__pycache__", "link"])
+
+    assert stats.copied == 1
+    assert stats.skipped == 1
+    assert (dest / "README.md").read_text() == "changed"
+
+
+def test_copy_tree_keeps_existing_files_without_overwrite(tmp_path):
+    source = make_tree(tmp_path / "source")
+    (tmp_path / "dest").mkdir()
+    (tmp_path / "dest" / "README.md").write_text("local")
+
+    copy_tree(source, tmp_path / "dest")
+
+    assert (tmp_path / "dest" / "README.md").read_text() == "local"
+
+
+def test_move_path(tmp_path):
+    source = make_tree(tmp_path / "source")
+
+    move_path(source, tmp_path / "moved")
+
+    assert not source.exists()
+    assert (tmp_path / "moved" / ".venv" / "pyvenv.cfg").exists()
+
+
+def test_copy_file_replaces_hardlinked_destination(tmp_path):
+    (tmp_path / "source.txt").write_text("new")
+    (tmp_path / "shared.txt").write_text("old")
+    os.chmod(tmp_path / "shared.txt", 0o444)
+    os.link(tmp_path / "shared.txt", tmp_path / "dest.txt")
+
+    copy_file(tmp_path / "source.txt", tmp_path / "dest.txt")
+
+    assert (tmp_path / "dest.txt").read_text() == "new"
+    assert (tmp_path / "shared.txt").read_text() == "old"  # the other link is not written through
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["dest.txt", "shared.txt", "source.txt"]
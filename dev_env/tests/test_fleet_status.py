@@ -0,0 +1,78 @@
+import subprocess
+
+from dev_env.core import fleet_status
+from dev_env.core.fleet_status import (
+    RepoStatus,
+    collect_fleet_status,
+    format_status_table,
+    parse_porcelain_v2,
+)
+
+PORCELAIN = """\
+# branch.oid 1234567890abcdef
+# branch.head main
+# branch.upstream origin/main
+# branch.ab +2 -3
+1 .M N... 100644 100644 100644 aaa bbb README.md
+1 A. N... 000000 100644 100644 000 ccc new.py
+2 RM N... 100644 100644 100644 ddd eee R100 moved.py\told.py
+u UU N... 100644 100644 100644 100644 fff ggg hhh conflict.py
+? untracked.txt
+"""
+
+
+def test_parse_porcelain_v2():
+    status = parse_porcelain_v2("/projects/calmlib", PORCELAIN)
+
+    assert status.branch == "main"
+    assert status.upstream == "origin/main"
+    assert (status.ahead, status.behind) == (2, 3)
+    assert (status.staged, status.modified, status.untracked, status.conflicts) == (2, 2, 1, 1)
+    assert status.dirty == 6
+
+
+def make_repo(path):
+    subprocess.run(["git", "init", "-q", "-b", "main", str(path)], check=True)
+    (path / "file.txt").write_text("hello")
+    subprocess.run(["git", "-C", str(path), "add", "."], check=True)
+    subprocess.run(
+        ["git", "-C", str(path), "-c", "user.name=a", "-c", "user.email=a@b", "commit", "-qm", "init"], check=True
+    )
+    return path
+
+
+def test_collect_fleet_status_caches_by_key(tmp_path, monkeypatch):
+    monkeypatch.setenv("REPO_STORE_PATH", str(tmp_path / "inventory.db"))
+    clean = make_repo(tmp_path / "clean")
+    dirty = make_repo(tmp_path / "dirty")
+    (dirty / "new.txt").write_text("new")
+
+    statuses = collect_fleet_status([clean, dirty], workers=2)
+    assert [s.dirty for s in statuses] == [0, 1]
+    assert statuses[0].branch == "main"
+    assert statuses[0].last_commit_ts is not None
+
+    checked = []
+    original = fleet_status.get_repo_status
+    monkeypatch.setattr(fleet_status, "get_repo_status", lambda path: checked.append(path) or original(path))
+    collect_fleet_status([clean, dirty])
+    assert checked == []
+
+    subprocess.run(["git", "-C", str(dirty), "add", "."], check=True)
+    statuses = collect_fleet_status([clean, dirty])
+    assert checked == [dirty]
+    assert statuses[1].staged == 1
+
+
+def test_format_status_table_sorts():
+    statuses = [
+        RepoStatus("/a", branch="main", modified=1, last_commit_ts=100),
+        RepoStatus("/b", branch="dev", modified=5, last_commit_ts=200),
+        RepoStatus("/c", error="fatal: not a git repository"),
+    ]
+
+    lines = format_status_table(statuses, sort="dirty").splitlines()
+
+    assert lines[0].split() == ["REPO", "BRANCH", "DIRTY", "AHEAD", "BEHIND", "LAST", "COMMIT"]
+    assert [line.split()[0] for line in lines[1:]] == ["/b", "/a", "/c"]
+    assert "error: fatal" in lines[3]
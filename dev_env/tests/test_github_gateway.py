@@ -0,0 +1,56 @@
+import time
+
+from dev_env.core.github_gateway import GithubGateway, TokenBucket
+
+
+class FakeResponse:
+    def __init__(self, status, headers=None, body=""):
+        self.status = status
+        self.headers = headers or {}
+        self.body = body
+
+    def getheaders(self):
+        return self.headers.items()
+
+    def read(self):
+        return self.body
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=100, capacity=1)
+
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+
+    assert time.monotonic() - start >= 0.04
+
+
+def test_retries_after_secondary_rate_limit():
+    gateway = GithubGateway(rate=1000, burst=10)
+    responses = [FakeResponse(403, {"Retry-After": "0.05"}), FakeResponse(200)]
+
+    response = gateway.send(lambda: responses.pop(0))
+
+    assert response.status == 200
+    assert gateway.metrics.requests == 2
+    assert gateway.metrics.retries == 1
+    assert gateway.metrics.wait_time >= 0.04
+
+
+def test_permission_error_is_not_retried():
+    gateway = GithubGateway(rate=1000, burst=10)
+
+    response = gateway.send(lambda: FakeResponse(403, body="Resource not accessible"))
+
+    assert response.status == 403
+    assert gateway.metrics.retries == 0
+
+
+def test_gives_up_after_max_retries():
+    gateway = GithubGateway(rate=1000, burst=10, max_retries=2)
+
+    response = gateway.send(lambda: FakeResponse(429, {"Retry-After": "0"}))
+
+    assert response.status == 429
+    assert gateway.metrics.requests == 3
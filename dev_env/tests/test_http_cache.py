@@ -0,0 +1,136 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from dev_env.core.http_cache import (
+    CachingConnectionMixin,
+    CachingHTTPConnection,
+    HttpCache,
+    OfflineCacheMiss,
+    get_affected_paths,
+)
+
+ETAG = '"v1"'
+
+
+class FakeGithubHandler(BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        self.hits.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("X-RateLimit-Remaining", "4999")
+            self.end_headers()
+            return
+        body = b'[{"name": "calmlib"}]'
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-RateLimit-Remaining", "4998")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.hits.append((self.path, "POST"))
+        self.send_response(201)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    FakeGithubHandler.hits = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeGithubHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = HttpCache(tmp_path / "http", ttl=0)
+    CachingConnectionMixin.cache = cache
+    yield cache
+    CachingConnectionMixin.cache = None
+
+
+def get(server, url="/user/repos?page=1"):
+    cnx = CachingHTTPConnection("127.0.0.1", server.server_address[1])
+    cnx.request("GET", url, None, {"Authorization": "token abc"})
+    return cnx.getresponse()
+
+
+def test_revalidates_with_etag(server, cache):
+    first = get(server)
+    second = get(server)
+
+    assert first.status == 200
+    assert second.status == 200
+    assert second.read() == first.read()
+    assert FakeGithubHandler.hits == [("/user/repos?page=1", None), ("/user/repos?page=1", ETAG)]
+    # rate limit headers come from the fresh 304, not from the cached entry
+    assert dict(second.getheaders())["x-ratelimit-remaining"] == "4999"
+
+
+def test_fresh_entry_served_without_request(server, cache):
+    cache.ttl = 3600
+    get(server)
+    response = get(server)
+
+    assert response.read() == '[{"name": "calmlib"}]'
+    assert len(FakeGithubHandler.hits) == 1
+
+
+def test_write_invalidates_listing(server, cache, tmp_path):
+    cache.ttl = 3600
+    get(server)
+    cnx = CachingHTTPConnection("127.0.0.1", server.server_address[1])
+    cnx.request("POST", "/repos/calmmage/template/generate", "{}", {"Authorization": "token abc"})
+    cnx.getresponse()
+
+    get(server)
+
+    assert FakeGithubHandler.hits[-1] == ("/user/repos?page=1", ETAG)  # revalidated, not served blindly
+    get(server)
+    assert len(FakeGithubHandler.hits) == 3  # fresh again after the revalidation
+    # other processes see the invalidation too
+    assert HttpCache(tmp_path / "http", ttl=3600).is_invalidated({"key": "h:1/user/repos|x", "validated_at": 0})
+
+
+def test_get_affected_paths():
+    assert get_affected_paths("/repos/calmmage/calmlib?x=1") == [
+        "/orgs/calmmage/repos",
+        "/repos/calmmage",
+        "/repos/calmmage/calmlib/*",
+        "/user/repos",
+        "/users/calmmage/repos",
+    ]
+    assert "/user/repos/*" in get_affected_paths("/user/repos")
+
+
+def test_offline_serves_stale_data(server, cache):
+    get(server)
+    cache.offline = True
+
+    response = get(server)
+
+    assert response.read() == '[{"name": "calmlib"}]'
+    assert len(FakeGithubHandler.hits) == 1
+    with pytest.raises(OfflineCacheMiss):
+        get(server, "/user/repos?page=2")
+
+
+def test_evicts_by_size(tmp_path):
+    cache = HttpCache(tmp_path / "http", max_size_mb=0)
+    cache.put("a", 200, {}, "x" * 100)
+    cache.evict()
+
+    assert cache.get("a") is None
@@ -0,0 +1,73 @@
+import json
+
+from dev_env.core.inventory_store import InventoryStore
+
+
+def make_info(*authors):
+    return {"authors": {"head": "abc", "authors": list(authors), "emails": [f"{a.lower()}@example.com" for a in authors]}}
+
+
+def test_upsert_and_query_subset(tmp_path):
+    store = InventoryStore(tmp_path / "inventory.db")
+    store.upsert_repo("/projects/calmlib", make_info("Petr"))
+    store.upsert_repo("/projects/other", make_info("Else"))
+    store.upsert_repo("/work/thing", make_info("Petr", "Else"))
+
+    assert list(store.get_repos(prefix="/projects")) == ["/projects/calmlib", "/projects/other"]
+    assert list(store.get_repos(paths=["/work/thing"])) == ["/work/thing"]
+    assert store.find_repos_by_identity("PETR") == ["/projects/calmlib", "/work/thing"]
+    assert store.find_repos_by_identity("else@example.com") == ["/projects/other", "/work/thing"]
+
+    # upsert replaces the authors of the repo
+    store.upsert_repo("/work/thing", make_info("Else"))
+    assert store.find_repos_by_identity("petr") == ["/projects/calmlib"]
+
+
+def test_remove_repos_drops_authors(tmp_path):
+    store = InventoryStore(tmp_path / "inventory.db")
+    store.upsert_repo("/projects/calmlib", make_info("Petr"))
+
+    store.remove_repos(["/projects/calmlib"])
+
+    assert store.list_repo_paths() == []
+    assert store.find_repos_by_identity("petr") == []
+
+
+def test_find_repos_by_author(tmp_path):
+    store = InventoryStore(tmp_path / "inventory.db")
+    store.upsert_repo("/projects/calmlib", make_info("Petr Lavrov"))
+    store.upsert_repo("/projects/other", make_info("Else"))
+
+    assert store.find_repos_by_author(["LAVR"]) == {"/projects/calmlib"}
+    assert store.find_repos_by_author(["lavrov@example", "else"]) == {"/projects/calmlib", "/projects/other"}
+    assert store.find_repos_by_author(["pe"]) == {"/projects/calmlib"}  # shorter than a trigram
+    assert store.find_repos_by_author(["nobody"]) == set()
+
+    store.remove_repos(["/projects/calmlib"])
+    assert store.find_repos_by_author(["lavr"]) == set()
+    assert store.conn.execute("SELECT COUNT(*) FROM author_ngrams WHERE identity LIKE '%lavrov%'").fetchone()[0] == 0
+
+
+def test_second_connection_sees_committed_state(tmp_path):
+    writer = InventoryStore(tmp_path / "inventory.db")
+    reader = InventoryStore(tmp_path / "inventory.db")
+
+    writer.upsert_repo("/projects/calmlib", make_info("Petr"))
+    writer.set_meta("timestamp", "2024-01-01T00:00:00")
+
+    assert reader.get_repo("/projects/calmlib") == make_info("Petr")
+    assert reader.get_meta("timestamp") == "2024-01-01T00:00:00"
+    assert reader.get_meta("missing", {}) == {}
+
+
+def test_export_json(tmp_path):
+    store = InventoryStore(tmp_path / "inventory.db")
+    store.upsert_repo("/projects/calmlib", make_info("Petr"))
+    store.replace_dirs({"/projects": {"is_repo": False}})
+
+    store.export_json(tmp_path / "repo_discovery.json")
+
+    data = json.loads((tmp_path / "repo_discovery.json").read_text())
+    assert data["repos"] == ["/projects/calmlib"]
+    assert data["authors"] == {"/projects/calmlib": ["Petr"]}
+    assert data["dirs"] == {"/projects": {"is_repo": False}}
@@ -0,0 +1,80 @@
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from dev_env.core.repo_discovery import Settings, discover_local_projects, get_repo_cache
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is linux only")
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.fixture
+def watcher(tmp_path, monkeypatch):
+    from dev_env.core.inventory_watcher import InventoryWatcher
+
+    root = tmp_path / "projects"
+    (root / "existing" / ".git").mkdir(parents=True)
+    monkeypatch.setenv("PROJECTS_ROOT_DIRS", f'["{root}"]')
+    monkeypatch.setenv("REPO_STORE_PATH", str(tmp_path / "inventory.db"))
+    monkeypatch.setenv("DISCOVERY_WORKERS", "1")
+    monkeypatch.setenv("DISCOVERY_ENRICHERS", '["default_branch"]')
+    monkeypatch.setenv("INVENTORY_WATCHER_HEARTBEAT_INTERVAL", "0.2")
+
+    watcher = InventoryWatcher(Settings(), settle_delay=0.1)
+    stop_event = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(stop_event,))
+    thread.start()
+    assert wait_for(lambda: get_repo_cache().store.get_meta("watcher"))
+    yield root
+    stop_event.set()
+    thread.join()
+
+
+def repo_paths():
+    return get_repo_cache().store.list_repo_paths()
+
+
+def test_watcher_tracks_repos(watcher):
+    root = watcher
+    assert repo_paths() == [str(root / "existing")]
+
+    subprocess.run(["git", "init", "-q", str(root / "group" / "new")], check=True)
+    assert wait_for(lambda: str(root / "group" / "new") in repo_paths())
+
+    (root / "group").rename(root / "renamed")
+    assert wait_for(lambda: repo_paths() == [str(root / "existing"), str(root / "renamed" / "new")])
+
+    shutil.rmtree(root / "existing" / ".git")
+    assert wait_for(lambda: repo_paths() == [str(root / "renamed" / "new")])
+
+
+def test_discover_reads_store_while_watcher_runs(watcher, monkeypatch):
+    from dev_env.core import repo_discovery
+
+    monkeypatch.setattr(repo_discovery, "scan_local_projects", lambda *args: pytest.fail("scanned"))
+    repos, authors_map = discover_local_projects()
+
+    assert repos == [watcher / "existing"]
+
+
+def test_watcher_refreshes_changed_repos(watcher):
+    repo = watcher / "existing"
+    shutil.rmtree(repo / ".git")
+    subprocess.run(["git", "init", "-q", "-b", "main", str(repo)], check=True)
+    assert wait_for(lambda: (get_repo_cache().store.get_repo(str(repo)) or {}).get("default_branch") == "main")
+
+    subprocess.run(["git", "-C", str(repo), "symbolic-ref", "HEAD", "refs/heads/dev"], check=True)
+
+    assert wait_for(lambda: get_repo_cache().store.get_repo(str(repo))["default_branch"] == "dev")
@@ -0,0 +1,45 @@
+import os
+
+from dev_env.core.layout import Layout, OpType, reconcile
+
+
+def make_layout(root):
+    return Layout(
+        dirs=[root / "projects", root / "experiments" / "nested"],
+        symlinks={root / "code" / "projects": root / "projects", root / "code" / "gone": root / "missing"},
+    )
+
+
+def test_reconcile_creates_and_is_idempotent(tmp_path):
+    plan = reconcile(make_layout(tmp_path))
+
+    assert [op.type for op in plan.ops] == [OpType.MKDIR, OpType.MKDIR, OpType.MKDIR, OpType.SYMLINK, OpType.SYMLINK]
+    assert (tmp_path / "experiments" / "nested").is_dir()
+    assert os.readlink(tmp_path / "code" / "projects") == str(tmp_path / "projects")
+    assert list(plan.dangling) == [tmp_path / "code" / "gone"]
+
+    mtime = os.lstat(tmp_path / "code" / "projects").st_mtime_ns
+    plan = reconcile(make_layout(tmp_path))
+    assert plan.ops == []
+    assert os.lstat(tmp_path / "code" / "projects").st_mtime_ns == mtime
+
+
+def test_reconcile_relinks_and_reports_conflicts(tmp_path):
+    (tmp_path / "code").mkdir()
+    (tmp_path / "code" / "projects").symlink_to(tmp_path / "elsewhere")
+    (tmp_path / "projects").write_text("a file")
+
+    plan = reconcile(make_layout(tmp_path))
+
+    assert os.readlink(tmp_path / "code" / "projects") == str(tmp_path / "projects")
+    assert any(op.type == OpType.RELINK for op in plan.ops)
+    assert plan.conflicts == [f"{tmp_path / 'projects'} is not a dir"]
+    assert (tmp_path / "projects").read_text() == "a file"
+
+
+def test_dry_run_does_not_touch_disk(tmp_path):
+    plan = reconcile(make_layout(tmp_path), dry_run=True)
+
+    assert not (tmp_path / "projects").exists()
+    assert f"symlink {tmp_path / 'code' / 'projects'} -> {tmp_path / 'projects'}" in str(plan)
+    assert f"dangling {tmp_path / 'code' / 'gone'}" in str(plan)
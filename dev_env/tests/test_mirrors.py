@@ -0,0 +1,31 @@
+import subprocess
+
+from dev_env.core import mirrors
+from dev_env.core.sync_engine import SyncLimits
+
+
+def test_update_mirror_once_per_run(tmp_path, monkeypatch):
+    origin = tmp_path / "origin"
+    subprocess.run(["git", "init", "-q", str(origin)], check=True)
+    subprocess.run(
+        ["git", "-C", str(origin), "-c", "user.name=alice", "-c", "user.email=alice@example.com"]
+        + ["commit", "-q", "--allow-empty", "-m", "init"],
+        check=True,
+    )
+    monkeypatch.setattr(mirrors, "mirrors_dir", tmp_path / "mirrors")
+    fetches = []
+    original_fetch = mirrors._fetch_mirror
+    monkeypatch.setattr(mirrors, "_fetch_mirror", lambda path: fetches.append(path) or original_fetch(path))
+
+    limits = SyncLimits()
+    mirror_path = mirrors.update_mirror(str(origin), "calmmage/origin", limits)
+    mirrors.update_mirror(str(origin), "calmmage/origin", limits)
+    assert fetches == []  # just created
+
+    mirrors.update_mirror(str(origin), "calmmage/origin", SyncLimits())  # next sync run
+    assert fetches == [mirror_path]
+
+    config = subprocess.run(
+        ["git", "-C", str(mirror_path), "config", "--get", "gc.pruneExpire"], capture_output=True, text=True
+    )
+    assert config.stdout.strip() == "never"
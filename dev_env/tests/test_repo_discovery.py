@@ -0,0 +1,232 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from dev_env.core import repo_discovery
+from dev_env.core.repo_discovery import (
+    canonicalize_roots,
+    discover_local_projects,
+    enrich_repo,
+    get_repo_cache,
+    iter_enriched_repos,
+    iter_local_projects,
+    iter_git_repos,
+    load_author_index,
+    update_repo_authors,
+)
+
+
+def make_repo(path: Path) -> Path:
+    (path / ".git").mkdir(parents=True)
+    return path
+
+
+@pytest.fixture
+def projects_root(tmp_path):
+    make_repo(tmp_path / "calmlib")
+    make_repo(tmp_path / "calmlib" / "vendor" / "nested")
+    make_repo(tmp_path / "seasonal" / "2024-01-Jan" / "dev-jan-2024")
+    make_repo(tmp_path / "app" / "node_modules" / "some-package")
+    (tmp_path / "app" / "src").mkdir(parents=True)
+    return tmp_path
+
+
+def test_iter_git_repos_stops_at_repo(projects_root):
+    repos = list(iter_git_repos(projects_root, ignore=["node_modules"]))
+
+    assert repos == [
+        projects_root / "calmlib",
+        projects_root / "seasonal" / "2024-01-Jan" / "dev-jan-2024",
+    ]
+
+
+def test_iter_git_repos_nested(projects_root):
+    repos = set(iter_git_repos(projects_root, ignore=["node_modules"], nested=True))
+
+    assert projects_root / "calmlib" / "vendor" / "nested" in repos
+    assert projects_root / "app" / "node_modules" / "some-package" not in repos
+
+
+def test_iter_git_repos_ignore_patterns(projects_root):
+    repos = set(iter_git_repos(projects_root, ignore=["node_*", "seasonal"]))
+
+    assert repos == {projects_root / "calmlib"}
+
+
+def test_iter_git_repos_incremental(projects_root, monkeypatch):
+    state = {}
+    first = list(iter_git_repos(projects_root, ignore=["node_modules"], state=state))
+
+    # unchanged tree - nothing is listed again
+    scanned = []
+    original_scan_dir = repo_discovery._scan_dir
+    monkeypatch.setattr(repo_discovery, "_scan_dir", lambda *args: scanned.append(args) or original_scan_dir(*args))
+    new_state = {}
+    second = list(iter_git_repos(projects_root, ignore=["node_modules"], prev_state=state, state=new_state))
+    assert second == first
+    assert scanned == []
+
+    # new repo and a removed repo are picked up
+    make_repo(projects_root / "app" / "src" / "new-project")
+    shutil.rmtree(projects_root / "calmlib" / ".git")
+    third = set(iter_git_repos(projects_root, ignore=["node_modules"], prev_state=new_state))
+    assert projects_root / "app" / "src" / "new-project" in third
+    assert projects_root / "calmlib" not in third
+
+
+def commit(repo_path: Path, author: str):
+    (repo_path / "file.txt").write_text(author)
+    subprocess.run(["git", "-C", str(repo_path), "add", "."], check=True)
+    subprocess.run(
+        ["git", "-C", str(repo_path), "-c", f"user.name={author}", "-c", f"user.email={author}@example.com"]
+        + ["commit", "-qm", author],
+        check=True,
+    )
+
+
+def test_update_repo_authors_incremental(tmp_path, monkeypatch):
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    commit(tmp_path, "alice")
+    first = update_repo_authors(tmp_path)
+    assert first["authors"] == ["alice"]
+    assert first["emails"] == ["alice@example.com"]
+
+    # same HEAD - git log is not called at all
+    monkeypatch.setattr(repo_discovery, "iter_commit_authors", lambda *args: pytest.fail("history was read"))
+    assert update_repo_authors(tmp_path, first) is first
+    monkeypatch.undo()
+
+    commit(tmp_path, "bob")
+    read_ranges = []
+    original = repo_discovery.iter_commit_authors
+    monkeypatch.setattr(
+        repo_discovery, "iter_commit_authors", lambda path, rev: read_ranges.append(rev) or original(path, rev)
+    )
+    second = update_repo_authors(tmp_path, first)
+    assert second["authors"] == ["alice", "bob"]
+    assert read_ranges == [f"{first['head']}..{second['head']}"]
+
+    # history rewrite - full rebuild
+    subprocess.run(["git", "-C", str(tmp_path), "reset", "-q", "--hard", first["head"]], check=True)
+    commit(tmp_path, "carol")
+    third = update_repo_authors(tmp_path, second)
+    assert third["authors"] == ["alice", "carol"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_iter_enriched_repos(tmp_path, workers):
+    repos = []
+    for name in ["first", "second"]:
+        repo_path = tmp_path / name
+        subprocess.run(["git", "init", "-q", "-b", "main", str(repo_path)], check=True)
+        subprocess.run(["git", "-C", str(repo_path), "remote", "add", "origin", f"git@github.com:calmmage/{name}.git"])
+        commit(repo_path, "alice")
+        repos.append(repo_path)
+
+    results = dict(
+        iter_enriched_repos(iter(repos), ["authors", "default_branch", "remote_url", "size_on_disk"], workers=workers)
+    )
+
+    assert set(results) == set(repos)
+    info = results[tmp_path / "second"]
+    assert info["authors"]["authors"] == ["alice"]
+    assert info["default_branch"] == "main"
+    assert info["remote_url"] == "git@github.com:calmmage/second.git"
+    assert info["size_on_disk"] > 0
+
+
+def test_iter_enriched_repos_unchanged(tmp_path, monkeypatch):
+    enrichers = ["authors", "default_branch", "remote_url", "last_commit_date"]
+    subprocess.run(["git", "init", "-q", "-b", "main", str(tmp_path)], check=True)
+    commit(tmp_path, "alice")
+    prev_info = {str(tmp_path): info for _path, info in iter_enriched_repos([tmp_path], enrichers, workers=1)}
+
+    # unchanged repo - no git call and no process pool
+    monkeypatch.setattr(repo_discovery.subprocess, "run", lambda *args, **kwargs: pytest.fail("git was called"))
+    monkeypatch.setattr(repo_discovery, "ProcessPoolExecutor", lambda *args, **kwargs: pytest.fail("pool started"))
+    results = dict(iter_enriched_repos([tmp_path], enrichers, prev_info, workers=2))
+    assert results[tmp_path] == prev_info[str(tmp_path)]
+    monkeypatch.undo()
+
+    subprocess.run(["git", "-C", str(tmp_path), "remote", "add", "origin", "git@github.com:calmmage/repo.git"])
+    results = dict(iter_enriched_repos([tmp_path], enrichers, prev_info, workers=1))
+    assert results[tmp_path]["remote_url"] == "git@github.com:calmmage/repo.git"
+
+
+def test_enrich_repo_isolates_failures(tmp_path, monkeypatch):
+    def broken(repo_path, prev):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(repo_discovery.ENRICHERS, "broken", broken)
+    info = enrich_repo(tmp_path, ["broken", "size_on_disk"])
+
+    assert "broken" not in info
+    assert "size_on_disk" in info
+
+
+def test_discover_local_projects_updates_store(tmp_path, monkeypatch):
+    root = tmp_path / "projects"
+    for name in ["first", "second"]:
+        subprocess.run(["git", "init", "-q", str(root / name)], check=True)
+        commit(root / name, "alice")
+    monkeypatch.setenv("PROJECTS_ROOT_DIRS", f'["{root}"]')
+    monkeypatch.setenv("REPO_STORE_PATH", str(tmp_path / "inventory.db"))
+    monkeypatch.setenv("DISCOVERY_WORKERS", "1")
+
+    repos, authors_map = discover_local_projects()
+    assert repos == [root / "first", root / "second"]
+    assert authors_map[str(root / "first")] == ["alice"]
+
+    shutil.rmtree(root / "second")
+    repos, _ = discover_local_projects()
+    assert repos == [root / "first"]
+    store = get_repo_cache().store
+    assert store.list_repo_paths() == [str(root / "first")]
+    assert load_author_index().find(["alice"]) == {str(root / "first")}
+
+
+def test_canonicalize_roots(tmp_path):
+    (tmp_path / "work" / "project").mkdir(parents=True)
+    (tmp_path / "code").symlink_to(tmp_path / "work")
+
+    roots = canonicalize_roots([tmp_path / "work" / "project", tmp_path / "code", tmp_path / "work", tmp_path / "other"])
+
+    assert roots == [tmp_path / "work", tmp_path / "other"]
+
+
+def test_discover_local_projects_walks_each_repo_once(tmp_path, monkeypatch):
+    make_repo(tmp_path / "work" / "calmlib")
+    (tmp_path / "code").mkdir()
+    (tmp_path / "code" / "calmlib").symlink_to(tmp_path / "work" / "calmlib")
+    monkeypatch.setenv("PROJECTS_ROOT_DIRS", f'["{tmp_path / "code"}", "{tmp_path / "work"}", "{tmp_path}"]')
+    monkeypatch.setenv("REPO_STORE_PATH", str(tmp_path / "inventory.db"))
+    monkeypatch.setenv("DISCOVERY_WORKERS", "1")
+
+    repos, _ = discover_local_projects(use_cache=False)
+
+    assert repos == [tmp_path / "work" / "calmlib"]
+
+
+def test_iter_local_projects_streams_and_saves_partial_run(tmp_path, monkeypatch):
+    root = tmp_path / "projects"
+    for name in ["first", "second"]:
+        subprocess.run(["git", "init", "-q", str(root / name)], check=True)
+        commit(root / name, "alice")
+    monkeypatch.setenv("PROJECTS_ROOT_DIRS", f'["{root}"]')
+    monkeypatch.setenv("REPO_STORE_PATH", str(tmp_path / "inventory.db"))
+    monkeypatch.setenv("DISCOVERY_WORKERS", "1")
+
+    projects = iter_local_projects()
+    first = next(projects)
+    assert first.path == root / "first"
+    assert first.authors == ["alice"]
+    assert first.matches_authors(["ALICE@example"])
+    assert not first.matches_authors(["bob"])
+
+    # the consumer stops early - what was enriched so far is in the store
+    projects.close()
+    assert get_repo_cache().store.list_repo_paths() == [str(root / "first")]
+
+    assert [repo.path for repo in iter_local_projects()] == [root / "first", root / "second"]
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import pytest
+
+from dev_env.core.repo_index import RepoIndex
+
+
+def make_repo(owner, name, updated_at=1):
+    return SimpleNamespace(
+        name=name,
+        full_name=f"{owner}/{name}",
+        clone_url=f"https://github.com/{owner}/{name}.git",
+        ssh_url=f"git@github.com:{owner}/{name}.git",
+        owner=SimpleNamespace(login=owner),
+        updated_at=updated_at,
+        pushed_at=updated_at,
+    )
+
+
+@pytest.fixture
+def repos():
+    return [
+        make_repo("engineering-friends", "calmlib"),
+        make_repo("calmmage", "calmlib"),
+        make_repo("calmmage", "bot-lib"),
+    ]
+
+
+def test_lookup_by_name_prefers_user_repos(repos):
+    index = RepoIndex(repos, user_login="calmmage")
+
+    candidates = index.find_by_name("calmlib")
+
+    assert [r.full_name for r in candidates] == ["calmmage/calmlib", "engineering-friends/calmlib"]
+    assert index.find_by_name("nonexistent") == []
+
+
+def test_lookup_by_url_and_full_name(repos):
+    index = RepoIndex(repos, user_login="calmmage")
+
+    assert index.find_by_url("https://github.com/calmmage/bot-lib.git").full_name == "calmmage/bot-lib"
+    assert index.find_by_url("git@github.com:calmmage/bot-lib.git").full_name == "calmmage/bot-lib"
+    assert index.get("engineering-friends/calmlib") is repos[0]
+    assert len(index.find_by_owner("calmmage")) == 2
+
+
+def test_incremental_update(repos):
+    index = RepoIndex(repos, user_login="calmmage")
+
+    updated_bot_lib = make_repo("calmmage", "bot-lib", updated_at=2)
+    new_listing = [repos[1], updated_bot_lib, make_repo("calmmage", "codechat")]
+    index.update(new_listing)
+
+    assert len(index) == 3
+    assert index.get("calmmage/bot-lib") is updated_bot_lib
+    assert index.get("calmmage/calmlib") is repos[1]
+    assert index.get("engineering-friends/calmlib") is None
+    assert [r.full_name for r in index.find_by_name("calmlib")] == ["calmmage/calmlib"]
+    assert index.find_by_owner("engineering-friends") == []
+    assert index.has_name("codechat")
+    assert index.source is new_listing
@@ -0,0 +1,60 @@
+import subprocess
+
+from git import Repo
+
+from dev_env.core import repo_updates
+
+
+def _make_origin(tmp_path):
+    origin = tmp_path / "origin"
+    subprocess.run(["git", "init", "-q", str(origin)], check=True)
+    (origin / "README.md").write_text("hello")
+    subprocess.run(["git", "-C", str(origin), "add", "README.md"], check=True)
+    subprocess.run(
+        ["git", "-C", str(origin), "-c", "user.name=alice", "-c", "user.email=alice@example.com"]
+        + ["commit", "-q", "-m", "init"],
+        check=True,
+    )
+    subprocess.run(["git", "-C", str(origin), "config", "uploadpack.allowFilter", "true"], check=True)
+    return origin
+
+
+def test_backfill_full_repo(tmp_path):
+    origin = _make_origin(tmp_path)
+    clone = Repo.clone_from(origin.as_uri(), tmp_path / "clone")
+
+    repo_updates.backfill_repo(clone)  # nothing to unset - must not fail
+
+    assert repo_updates._get_config(clone, "remote.origin.promisor") is None
+
+
+def test_backfill_blobless_repo(tmp_path, monkeypatch):
+    origin = _make_origin(tmp_path)
+    for supports_refetch in [True, False]:
+        monkeypatch.setattr(repo_updates, "_git_supports_refetch", lambda: supports_refetch)
+        clone = Repo.clone_from(origin.as_uri(), tmp_path / f"clone-{supports_refetch}", filter="blob:none")
+
+        repo_updates.backfill_repo(clone)
+
+        assert repo_updates._get_config(clone, "remote.origin.partialclonefilter") is None
+        # without --refetch old objects stay promised
+        expected_promisor = None if supports_refetch else "true"
+        assert repo_updates._get_config(clone, "remote.origin.promisor") == expected_promisor
+
+
+def test_remote_has_changes(tmp_path):
+    origin = _make_origin(tmp_path)
+    subprocess.run(["git", "-C", str(origin), "branch", "feature"], check=True)
+    clone = Repo.clone_from(origin.as_uri(), tmp_path / "clone")
+
+    assert not repo_updates.remote_has_changes(clone)
+
+    subprocess.run(["git", "-C", str(origin), "branch", "-D", "feature"], check=True)
+    assert not repo_updates.remote_has_changes(clone)  # stale origin/feature doesn't count
+
+    subprocess.run(
+        ["git", "-C", str(origin), "-c", "user.name=alice", "-c", "user.email=alice@example.com"]
+        + ["commit", "-q", "--allow-empty", "-m", "update"],
+        check=True,
+    )
+    assert repo_updates.remote_has_changes(clone)
@@ -0,0 +1,99 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from dev_env.core.sync_engine import RepoSyncResult, SyncLimits, SyncStatus, run_parallel, summarize
+
+
+def make_repos(n):
+    return [SimpleNamespace(name=f"repo-{i}") for i in range(n)]
+
+
+def test_run_parallel_collects_results():
+    def sync_repo(repo):
+        return RepoSyncResult(repo.name, SyncStatus.CLONED)
+
+    results = run_parallel(make_repos(5), sync_repo, workers=3)
+
+    assert sorted(r.name for r in results) == [f"repo-{i}" for i in range(5)]
+    assert all(r.status == SyncStatus.CLONED for r in results)
+    assert all(r.duration >= 0 for r in results)
+
+
+def test_run_parallel_reports_exceptions_as_failed():
+    def sync_repo(repo):
+        if repo.name == "repo-1":
+            raise RuntimeError("boom")
+        return RepoSyncResult(repo.name, SyncStatus.UP_TO_DATE)
+
+    results = {r.name: r for r in run_parallel(make_repos(3), sync_repo, workers=2)}
+
+    assert results["repo-1"].status == SyncStatus.FAILED
+    assert results["repo-1"].error == "boom"
+    assert results["repo-0"].status == SyncStatus.UP_TO_DATE
+
+
+def test_sync_limits_cap_network_phase():
+    limits = SyncLimits(network=2, disk=1)
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def sync_repo(repo):
+        with limits.network():
+            with lock:
+                active.append(repo.name)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.remove(repo.name)
+        return RepoSyncResult(repo.name, SyncStatus.PULLED)
+
+    run_parallel(make_repos(8), sync_repo, workers=8)
+
+    assert max(peak) <= 2
+
+
+def test_summarize():
+    results = [
+        RepoSyncResult("a", SyncStatus.CLONED),
+        RepoSyncResult("b", SyncStatus.FAILED),
+        RepoSyncResult("c", SyncStatus.FAILED),
+    ]
+    summary = summarize(results)
+
+    assert summary["cloned"] == 1
+    assert summary["failed"] == 2
+    assert summary["pulled"] == 0
+    assert summary["total"] == 3
+
+
+def test_summarize_counts_skipped_fetches():
+    results = [
+        RepoSyncResult("a", SyncStatus.UP_TO_DATE, fetch_skipped=True),
+        RepoSyncResult("b", SyncStatus.UP_TO_DATE),
+        RepoSyncResult("c", SyncStatus.PULLED),
+    ]
+    summary = summarize(results)
+
+    assert summary["up-to-date"] == 2
+    assert summary["fetch_skipped"] == 1
+    assert summary["total"] == 3
+
+
+def test_run_parallel_starts_before_listing_is_complete():
+    first_done = threading.Event()
+
+    def slow_listing():
+        yield SimpleNamespace(name="repo-0")
+        # the next "page" only arrives after the first repo was processed
+        assert first_done.wait(timeout=5)
+        yield SimpleNamespace(name="repo-1")
+
+    def sync_repo(repo):
+        first_done.set()
+        return RepoSyncResult(repo.name, SyncStatus.CLONED)
+
+    results = run_parallel(slow_listing(), sync_repo, workers=2)
+
+    assert len(results) == 2
@@ -0,0 +1,64 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from old_dev_env.utils.template_compiler import TemplateCache, to_package_name
+
+TEMPLATES_DIR = Path(__file__).parents[2] / "resources" / "project_templates"
+
+
+@pytest.fixture
+def template(tmp_path):
+    template = tmp_path / "template"
+    (template / "project_name" / "lib").mkdir(parents=True)
+    (template / "empty").mkdir()
+    (template / "project_name" / "main.py").write_text("from project_name.lib import run\n")
+    (template / "pyproject.toml").write_text('name = "project_name"\n')
+    (template / "logo.bin").write_bytes(b"\0project_name\xff")
+    (template / "run.sh").write_text("echo project_name\n")
+    os.chmod(template / "run.sh", 0o755)
+    (template / "link").symlink_to("pyproject.toml")
+    (template / "__pycache__").mkdir()
+    return template
+
+
+def test_instantiate(tmp_path, template):
+    cache = TemplateCache(tmp_path / "cache")
+
+    project = cache.instantiate(template, tmp_path / "my-app", {"project_name": "my_app"})
+
+    assert (project / "my_app" / "main.py").read_text() == "from my_app.lib import run\n"
+    assert (project / "my_app" / "lib").is_dir()
+    assert (project / "empty").is_dir()
+    assert (project / "pyproject.toml").read_text() == 'name = "my_app"\n'
+    assert (project / "logo.bin").read_bytes() == b"\0project_name\xff"  # binary files are copied as is
+    assert os.stat(project / "run.sh").st_mode & 0o777 == 0o755
+    assert os.readlink(project / "link") == "pyproject.toml"
+    assert not (project / "__pycache__").exists()
+
+
+def test_compiled_once(tmp_path, template):
+    cache = TemplateCache(tmp_path / "cache")
+    compiled = cache.compile(template)
+
+    assert cache.compile(template).content_hash == compiled.content_hash
+    assert len(list((tmp_path / "cache").glob("*/manifest.json"))) == 1
+
+    (template / "pyproject.toml").write_text('name = "project_name"\nversion = "1"\n')
+    recompiled = cache.compile(template)
+
+    assert recompiled.content_hash != compiled.content_hash
+    project = cache.instantiate(template, tmp_path / "app", {"project_name": "app"})
+    assert (project / "pyproject.toml").read_text() == 'name = "app"\nversion = "1"\n'
+
+
+def test_repo_templates(tmp_path):
+    cache = TemplateCache(tmp_path / "cache")
+
+    project = cache.instantiate(
+        TEMPLATES_DIR / "python_telegram_bot", tmp_path / "bot", {"project_name": to_package_name("my-bot")}
+    )
+
+    assert (project / "my_bot").is_dir()
+    assert not list(project.rglob("*project_name*"))
@@ -0,0 +1,71 @@
+import json
+import os
+import stat
+import subprocess
+import sys
+
+import pytest
+
+from old_dev_env.utils.venv_pool import VenvPool, _find_relocatable_files, _make_read_only, get_pyproject_hash
+
+
+@pytest.fixture
+def template(tmp_path):
+    template = tmp_path / "template"
+    template.mkdir()
+    (template / "pyproject.toml").write_text('[tool.poetry]\nname = "project-name"\n')
+    return template
+
+
+@pytest.fixture
+def pool(tmp_path, template):
+    """Pool with a warmed entry for the template - built with venv instead of poetry"""
+    pool = VenvPool(tmp_path / "pool")
+    entry = pool.root / get_pyproject_hash(template)
+    venv = entry / "project" / ".venv"
+    subprocess.run([sys.executable, "-m", "venv", "--without-pip", str(venv)], check=True)
+    (venv / "lib" / "data.txt").write_text("shared")
+    (venv / "lib" / "paths.pth").write_text("/some/path")
+    (entry / "project" / "poetry.lock").write_text("lock")
+    (entry / "relocate.json").write_text(json.dumps(_find_relocatable_files(venv)))
+    _make_read_only(venv)
+    (entry / "ready").touch()
+    return pool
+
+
+def test_clone(tmp_path, template, pool):
+    project = tmp_path / "project"
+    project.mkdir()
+
+    venv = pool.clone(template, project)
+
+    assert venv == project / ".venv"
+    assert str(venv) in (venv / "bin" / "activate").read_text()
+    assert str(pool.root) not in (venv / "bin" / "activate").read_text()
+    source = pool.get_entry(template) / "project" / ".venv"
+    shared = os.stat(venv / "lib" / "data.txt")
+    if shared.st_ino == os.stat(source / "lib" / "data.txt").st_ino:  # hardlinked - no reflink on this fs
+        assert not shared.st_mode & stat.S_IWUSR  # pool files can't be edited in place through a project
+    assert os.stat(venv / "lib" / "paths.pth").st_ino != os.stat(source / "lib" / "paths.pth").st_ino
+    assert os.stat(venv / "lib" / "paths.pth").st_mode & stat.S_IWUSR
+    assert os.stat(venv / "bin" / "activate").st_mode & stat.S_IWUSR
+    assert (project / "poetry.lock").read_text() == "lock"
+    result = subprocess.run(
+        [str(venv / "bin" / "python"), "-c", "import sys; print(sys.prefix)"], capture_output=True, text=True
+    )
+    assert result.stdout.strip() == str(venv)
+
+
+def test_clone_not_warmed(tmp_path, template):
+    pool = VenvPool(tmp_path / "pool")
+
+    assert pool.get_entry(template) is None
+    assert pool.clone(template, tmp_path / "project") is None
+
+
+def test_entry_keyed_by_pyproject(template, pool):
+    assert pool.get_entry(template) is not None
+
+    (template / "pyproject.toml").write_text('[tool.poetry]\nname = "project-name"\nversion = "1"\n')
+
+    assert pool.get_entry(template) is None
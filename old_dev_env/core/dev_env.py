@@ -9,7 +9,11 @@ from deprecated import deprecated
 from dotenv import load_dotenv
 
 from dev_env.core.presets import latest_preset
-from calmlib.utils import get_logger, copy_tree
+from calmlib.utils import get_logger
+from dev_env.utils.backup_store import BackupStore
+from dev_env.utils.file_operations import copy_tree, move_path
+from dev_env.utils.template_compiler import instantiate_template
+from dev_env.utils.venv_pool import setup_project_venv
 
 logger = get_logger(__name__)
 
@@ -118,7 +122,6 @@ class CalmmageDevEnv:
         root_dir = Path(self.root_dir).expanduser()
         root_dir.mkdir(parents=True, exist_ok=True)
 
-        paths = self.preset.dirs
         # paths = [
         #     "code/seasonal/past",
         #     "code/structured/unsorted",
@@ -129,8 +132,7 @@ class CalmmageDevEnv:
         #     "workspace/launchd/scripts"
         #     "workspace/launchd/logs"
         # ]
-        for path in paths:
-            (root_dir / path).mkdir(parents=True, exist_ok=True)
+        self.preset().build(root_dir)
 
     def _setup_monthly_projects_dir(self, root=None, date=None):
         """
@@ -350,9 +352,11 @@ class CalmmageDevEnv:
         templates = self.get_local_template_names()
         if template_name not in templates:
             raise ValueError(f"Invalid template name: {template_name}. Available templates: {templates}")
-        # copy template to the new project dir
+        # render the compiled template into the new project dir - project_name in paths and contents
         template_dir = self.get_local_template(template_name)
-        copy_tree(str(template_dir), str(project_dir))
+        instantiate_template(template_dir, project_dir, name)
+        # ready-made .venv from the pool - the project runs without a `poetry install`
+        setup_project_venv(template_dir, project_dir)
 
         return project_dir
 
@@ -535,32 +539,13 @@ class CalmmageDevEnv:
     def _copy_project_files_to_github_clone(original_project_path, clone_project_path):
         return copy_tree(original_project_path, clone_project_path, overwrite=True)
 
-    @staticmethod
-    def get_backup_path(original_project_path, suffix="_backup"):
-        backup_path = original_project_path.parent / (original_project_path.name + "_backup")
-        counter = 1
-        while os.path.exists(backup_path):
-            backup_path = original_project_path.parent / (f"{original_project_path.name}{suffix}({counter})")
-            counter += 1
-        return backup_path
-
-    @staticmethod
-    def get_latest_backup_path(original_project_path, suffix="_backup"):
-        backup_path = original_project_path.parent / (original_project_path.name + suffix)
-        counter = 1
-        while True:
-            next_path = original_project_path.parent / (f"{original_project_path.name}{suffix}({counter})")
-            if not next_path.exists():
-                return backup_path
-            backup_path = next_path
-            counter += 1
-
     def _replace_original_project_with_github_clone(self, original_project_path, clone_project_path):
         # Remove the original project directory
-        backup_path = self.get_backup_path(original_project_path)
-        shutil.move(str(original_project_path), str(backup_path))
+        backup_id = BackupStore().backup(original_project_path)
+        logger.info(f"Backed up {original_project_path} as {backup_id}")
+        shutil.rmtree(original_project_path)
         # Move the cloned project directory to the original project location
-        shutil.move(str(clone_project_path), original_project_path)
+        move_path(clone_project_path, original_project_path)
 
     @staticmethod
     def _push_local_changes_to_github(project_path):
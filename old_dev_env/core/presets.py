@@ -1,24 +1,33 @@
+from pathlib import Path
+
+from dev_env.core.layout import Layout, Plan, reconcile
+
+
 class Preset:
-    dirs: list
-    softlinks: dict
+    dirs: list = []
+    softlinks: dict = {}  # link -> target, relative to root_dir ("~" is expanded)
+
+    def get_layout(self, root_dir) -> Layout:
+        root_dir = Path(root_dir).expanduser()
+        layout = Layout(dirs=[root_dir / dir for dir in self.dirs])
+        for link, target in self.softlinks.items():
+            layout.add_symlink(root_dir / link, root_dir / Path(target).expanduser())
+        return layout
 
-    def build(self, root_dir):
-        for dir in self.dirs:
-            # create dir
-            pass
-        for source, target in self.softlinks.items():
-            # create softlink
-            pass
+    def build(self, root_dir, dry_run=False) -> Plan:
+        """Create the missing dirs and softlinks - only what differs from the disk is touched"""
+        return reconcile(self.get_layout(root_dir), dry_run)
 
 
 presets = []
 
 
 class PresetJan2024(Preset):
-    def build(self, root_dir):
-        super().build(root_dir)
+    def build(self, root_dir, dry_run=False) -> Plan:
+        plan = super().build(root_dir, dry_run)
 
         # todo: build the first seasonal dir, add all soflinks
+        return plan
 
     dirs = [
         # "code",
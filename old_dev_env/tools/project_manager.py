@@ -7,6 +7,7 @@ from typing_extensions import Annotated
 
 from calmlib.utils.common import is_subsequence
 from dev_env import CalmmageDevEnv
+from dev_env.utils.backup_store import BackupStore
 
 # Instantiate the CalmmageDevEnv object
 dev_env = CalmmageDevEnv()
@@ -148,7 +149,11 @@ def move_project_to_github(
         project_path, template_name=template, project_name=project_name
     )
     typer.echo(f"Project {project_name} moved to GitHub using template {template}.")
-    backup_path = dev_env.get_latest_backup_path(project_path)
+    backup_store = BackupStore()
+    backup_id = backup_store.get_latest_backup(project_path)
+    if backup_id is None:
+        return
+    backup_path = backup_store.get_snapshot_path(backup_id)
     typer.echo(f"Project backup is available at {backup_path}")
     pyperclip.copy(str(backup_path))
 
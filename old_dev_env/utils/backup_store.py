@@ -0,0 +1,269 @@
+import errno
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from .file_operations import copy_file
+
+DEFAULT_BACKUPS_DIR = Path("~/.calmmage/backups").expanduser()
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class BackupStore:
+    """
+    Content-addressed backups of project dirs.
+    ~/.calmmage/backups/
+        objects/ab/abcdef...  - file contents, by hash, read-only. Stored once for all backups
+        manifests/<id>.json   - files of one backup: path -> hash, mode, size, mtime. Plus dirs and symlinks
+        snapshots/<id>/       - browsable tree of the backup, hardlinks to the objects
+        index.json            - source -> backup ids, backup id -> summary
+    Unchanged files across backups share one object. Listing, latest and restore lookups read only the index.
+    Safe to use from several processes: index updates are merged under a file lock,
+    and gc() waits for running backups.
+    """
+
+    def __init__(self, root: Path = DEFAULT_BACKUPS_DIR, workers: int = 8):
+        self.root = Path(root).expanduser()
+        self.objects_dir = self.root / "objects"
+        self.manifests_dir = self.root / "manifests"
+        self.snapshots_dir = self.root / "snapshots"
+        self.index_path = self.root / "index.json"
+        self.workers = workers
+        self._lock = threading.Lock()
+        for path in [self.objects_dir, self.manifests_dir, self.snapshots_dir]:
+            path.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def _file_lock(self, name: str, exclusive: bool = True):
+        """flock on root/<name> - shared with other processes using the same store"""
+        with open(self.root / name, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    # region index
+    def _load_index(self) -> Dict:
+        if not self.index_path.exists():
+            return {"by_source": {}, "backups": {}}
+        return json.loads(self.index_path.read_text())
+
+    def _update_index(self, update: Callable[[Dict], None]):
+        """Re-read the index, apply update to it and save - under a lock, so concurrent writers don't lose entries"""
+        with self._lock, self._file_lock("index.lock"):
+            index = self._load_index()
+            update(index)
+            tmp_path = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(index, indent=2))
+            os.replace(tmp_path, self.index_path)
+
+    def list_backups(self, source: Path = None) -> List[Dict]:
+        """Backup summaries, oldest first. If source is given - only backups of that dir"""
+        index = self._load_index()
+        if source is None:
+            ids = list(index["backups"])
+        else:
+            ids = index["by_source"].get(str(Path(source).expanduser().absolute()), [])
+        return [{"id": backup_id, **index["backups"][backup_id]} for backup_id in ids]
+
+    def get_latest_backup(self, source: Path) -> Optional[str]:
+        ids = self._load_index()["by_source"].get(str(Path(source).expanduser().absolute()))
+        return ids[-1] if ids else None
+
+    def get_snapshot_path(self, backup_id: str) -> Path:
+        return self.snapshots_dir / backup_id
+
+    def load_manifest(self, backup_id: str) -> Dict:
+        return json.loads((self.manifests_dir / f"{backup_id}.json").read_text())
+
+    # endregion index
+
+    # region objects
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    @staticmethod
+    def _hash_file(path: Path) -> str:
+        digest = hashlib.blake2b()
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _store_object(self, path: Path, digest: str) -> bool:
+        """Copy the file into the object store, if it is not there yet. Returns True if it was added."""
+        object_path = self._object_path(digest)
+        if object_path.exists():
+            return False
+        object_path.parent.mkdir(exist_ok=True)
+        tmp_path = object_path.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+        copy_file(path, tmp_path)
+        os.chmod(tmp_path, 0o444)  # snapshots hardlink to it - nobody should edit it in place
+        os.replace(tmp_path, object_path)
+        return True
+
+    # endregion objects
+
+    def backup(self, source: Path, ignore: Iterable[str] = ()) -> str:
+        """
+        Back up the source dir.
+        Files with the same size and mtime as in the previous backup of the source are not re-hashed.
+        Args:
+            ignore: names (fnmatch patterns) of files and dirs to leave out
+        Returns:
+            backup id
+        """
+        source = Path(source).expanduser().absolute()
+        # shared lock: backups run in parallel, gc() waits for them - it must not see objects not linked yet
+        with self._file_lock("gc.lock", exclusive=False):
+            return self._backup(source, list(ignore))
+
+    def _backup(self, source: Path, ignore: List[str]) -> str:
+        previous_id = self.get_latest_backup(source)
+        previous_files = self.load_manifest(previous_id)["files"] if previous_id else {}
+
+        files, symlinks, dirs = {}, {}, []
+        stack = [source]
+        while stack:
+            dir_path = stack.pop()
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    if any(fnmatch(entry.name, pattern) for pattern in ignore):
+                        continue
+                    rel_path = os.path.relpath(entry.path, source)
+                    if entry.is_symlink():
+                        symlinks[rel_path] = os.readlink(entry.path)
+                    elif entry.is_dir():
+                        dirs.append(rel_path)  # empty dirs are part of the backup too
+                        stack.append(Path(entry.path))
+                    else:
+                        st = entry.stat()
+                        if not stat.S_ISREG(st.st_mode):
+                            logger.warning(f"Skipping special file (fifo, socket, device): {entry.path}")
+                            continue
+                        files[rel_path] = {
+                            "mode": stat.S_IMODE(st.st_mode),
+                            "size": st.st_size,
+                            "mtime_ns": st.st_mtime_ns,
+                        }
+
+        def add_file(rel_path: str) -> bool:
+            info = files[rel_path]
+            prev = previous_files.get(rel_path)
+            if prev and prev["size"] == info["size"] and prev["mtime_ns"] == info["mtime_ns"]:
+                info["hash"] = prev["hash"]
+                if self._object_path(prev["hash"]).exists():
+                    return False
+            else:
+                info["hash"] = self._hash_file(source / rel_path)
+            return self._store_object(source / rel_path, info["hash"])
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            new_objects = sum(executor.map(add_file, files))
+
+        backup_id = f"{source.name}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+        manifest = {"id": backup_id, "source": str(source), "files": files, "symlinks": symlinks, "dirs": dirs}
+        (self.manifests_dir / f"{backup_id}.json").write_text(json.dumps(manifest))
+        self._build_snapshot(backup_id, manifest)
+
+        def add_backup(index: Dict):
+            index["backups"][backup_id] = {
+                "source": str(source),
+                "created_at": datetime.now().isoformat(),
+                "files": len(files),
+                "bytes": sum(info["size"] for info in files.values()),
+            }
+            index["by_source"].setdefault(str(source), []).append(backup_id)
+
+        self._update_index(add_backup)
+        logger.info(f"Backed up {source} as {backup_id}: {len(files)} files, {new_objects} new objects")
+        return backup_id
+
+    def _build_snapshot(self, backup_id: str, manifest: Dict):
+        snapshot = self.get_snapshot_path(backup_id)
+        snapshot.mkdir(exist_ok=True)
+        for rel_path in manifest.get("dirs", []):
+            (snapshot / rel_path).mkdir(parents=True, exist_ok=True)
+        for rel_path, info in manifest["files"].items():
+            path = snapshot / rel_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(self._object_path(info["hash"]), path)
+            except OSError as e:
+                if e.errno != errno.EMLINK:
+                    raise
+                copy_file(self._object_path(info["hash"]), path)  # object has too many links already
+        for rel_path, target in manifest["symlinks"].items():
+            path = snapshot / rel_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.symlink_to(target)
+
+    def restore(self, backup_id: str, destination: Path) -> Path:
+        """Recreate the backed up dir at destination - as independent, writable files"""
+        destination = Path(destination).expanduser()
+        if destination.exists():
+            raise FileExistsError(f"Destination already exists: {destination}")
+        manifest = self.load_manifest(backup_id)
+
+        def restore_file(item):
+            rel_path, info = item
+            path = destination / rel_path
+            copy_file(self._object_path(info["hash"]), path)
+            os.chmod(path, info["mode"])
+            os.utime(path, ns=(info["mtime_ns"], info["mtime_ns"]))
+
+        destination.mkdir(parents=True)
+        for rel_path in manifest.get("dirs", []):
+            (destination / rel_path).mkdir(parents=True, exist_ok=True)
+        for rel_path in manifest["files"]:
+            (destination / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(restore_file, manifest["files"].items()))
+        for rel_path, target in manifest["symlinks"].items():
+            path = destination / rel_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.symlink_to(target)
+        return destination
+
+    def delete(self, backup_id: str):
+        """Remove a backup. Its objects are freed by gc() once no other backup uses them."""
+
+        def remove_backup(index: Dict):
+            summary = index["backups"].pop(backup_id)
+            index["by_source"][summary["source"]].remove(backup_id)
+            if not index["by_source"][summary["source"]]:
+                del index["by_source"][summary["source"]]
+
+        self._update_index(remove_backup)
+        shutil.rmtree(self.get_snapshot_path(backup_id), ignore_errors=True)
+        (self.manifests_dir / f"{backup_id}.json").unlink(missing_ok=True)
+
+    def gc(self) -> int:
+        """
+        Remove objects no manifest refers to. Waits for running backups - their objects are not in a manifest yet.
+        Returns:
+            number of removed objects
+        """
+        with self._file_lock("gc.lock"):
+            live = set()
+            for manifest_path in self.manifests_dir.glob("*.json"):
+                live.update(info["hash"] for info in json.loads(manifest_path.read_text())["files"].values())
+            removed = 0
+            for object_path in self.objects_dir.glob("*/*"):
+                if object_path.name not in live:
+                    object_path.unlink()
+                    removed += 1
+        return removed
@@ -1,5 +1,15 @@
+import errno
+import fcntl
+import hashlib
+import os
 import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from fnmatch import fnmatch
 from pathlib import Path
+from typing import Iterable
 from deprecated import deprecated
 from loguru import logger
 
@@ -20,28 +30,226 @@ from loguru import logger
 #                 shutil.copy2(item, destination / item.name)
 
 
+DEFAULT_IGNORE = [".venv", "venv", "__pycache__", "*.pyc", ".mypy_cache", ".pytest_cache", ".ruff_cache", ".DS_Store"]
+
+FICLONE = 0x40049409  # linux ioctl: share the extents of a file (btrfs, xfs, ...)
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# (src device, dst device) pairs where reflink failed - don't try again for every file
+_no_reflink = set()
+_no_reflink_lock = threading.Lock()
+
+
+@dataclass
+class CopyStats:
+    copied: int = 0
+    reflinked: int = 0  # of copied - copy-on-write clones, no data written
+    skipped: int = 0  # identical or existing (without overwrite) files
+    bytes: int = 0
+
+    def add(self, other: "CopyStats"):
+        self.copied += other.copied
+        self.reflinked += other.reflinked
+        self.skipped += other.skipped
+        self.bytes += other.bytes
+
+
+def _reflink(source: Path, destination: Path) -> bool:
+    """Copy-on-write clone of the file. False if the filesystem does not support it."""
+    if sys.platform == "darwin":
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        if destination.exists():
+            destination.unlink()
+        return libc.clonefile(os.fsencode(source), os.fsencode(destination), 0) == 0
+    if not sys.platform.startswith("linux"):
+        return False
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return True
+        except OSError:
+            return False
+
+
+def _copy_file_range(source: Path, destination: Path, size: int) -> bool:
+    """In-kernel copy - no round trip of the data through user space"""
+    if not hasattr(os, "copy_file_range"):
+        return False
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        copied = 0
+        try:
+            while copied < size:
+                n = os.copy_file_range(src.fileno(), dst.fileno(), size - copied)
+                if n == 0:
+                    break
+                copied += n
+        except OSError as e:
+            if e.errno in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP) and copied == 0:
+                return False
+            raise
+    return True
+
+
+def reflink_file(source: Path, destination: Path) -> bool:
+    """
+    Copy-on-write clone of the file with its metadata - an independent file that shares the data on disk.
+    Returns:
+        False if the filesystem can't - then nothing is written
+    """
+    devices = (os.stat(source).st_dev, os.stat(Path(destination).parent).st_dev)
+    if devices in _no_reflink:
+        return False
+    if _reflink(source, destination):
+        shutil.copystat(source, destination)
+        return True
+    with _no_reflink_lock:
+        _no_reflink.add(devices)
+    if os.path.lexists(destination):
+        os.unlink(destination)
+    return False
+
+
+def copy_file(source: Path, destination: Path) -> bool:
+    """
+    Copy a file with metadata: reflink, then copy_file_range, then a plain copy.
+    The copy is written to a temp file next to the destination and renamed over it - an existing
+    destination is replaced, never written in place (its other hardlinks keep the old content).
+    Returns:
+        True if the file was reflinked
+    """
+    destination = Path(destination)
+    source_stat = os.stat(source)
+    tmp_path = destination.with_name(f".{destination.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        reflinked = reflink_file(source, tmp_path)
+        if not reflinked:
+            if not _copy_file_range(source, tmp_path, source_stat.st_size):
+                shutil.copyfile(source, tmp_path)
+            shutil.copystat(source, tmp_path)
+        os.replace(tmp_path, destination)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            tmp_path.unlink()
+        raise
+    return reflinked
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_same_file(source: Path, destination: Path, source_stat: os.stat_result = None, check_hash: bool = True) -> bool:
+    """Same size and mtime (copies keep the mtime) - or, with check_hash, same size and content"""
+    source_stat = source_stat or os.stat(source)
+    try:
+        dest_stat = os.stat(destination)
+    except FileNotFoundError:
+        return False
+    if source_stat.st_size != dest_stat.st_size:
+        return False
+    if source_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+        return True
+    return check_hash and _file_hash(source) == _file_hash(destination)
+
+
+def _copy_one(source: Path, destination: Path, overwrite: bool, check_hash: bool) -> CopyStats:
+    stats = CopyStats()
+    source_stat = os.stat(source)
+    if os.path.lexists(destination):
+        if not overwrite or is_same_file(source, destination, source_stat, check_hash):
+            stats.skipped += 1
+            return stats
+        if destination.is_symlink():
+            destination.unlink()
+    stats.reflinked += copy_file(source, destination)
+    stats.copied += 1
+    stats.bytes += source_stat.st_size
+    return stats
+
+
+def copy_tree(
+    source: Path,
+    destination: Path,
+    overwrite: bool = False,
+    ignore: Iterable[str] = DEFAULT_IGNORE,
+    workers: int = 8,
+    check_hash: bool = True,
+) -> CopyStats:
+    """
+    Copy a dir tree. Dirs are created while walking, files are copied on a thread pool.
+    Symlinks are copied as symlinks.
+    Args:
+        overwrite: replace existing files. Identical files (size + mtime, or content) are skipped anyway
+        ignore: names (fnmatch patterns) of files and dirs not to copy
+        workers: files copied in parallel
+        check_hash: if size matches but mtime does not - compare content before overwriting
+    """
+    source, destination = Path(source), Path(destination)
+    if not source.is_dir():
+        raise ValueError(f"Source ({source}) is not a directory.")
+    ignore = list(ignore)
+    stats = CopyStats()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        stack = [(source, destination)]
+        while stack:
+            src_dir, dst_dir = stack.pop()
+            dst_dir.mkdir(parents=True, exist_ok=True)
+            with os.scandir(src_dir) as it:
+                for entry in it:
+                    if any(fnmatch(entry.name, pattern) for pattern in ignore):
+                        continue
+                    src_path, dst_path = Path(entry.path), dst_dir / entry.name
+                    if entry.is_symlink():
+                        if os.path.lexists(dst_path):
+                            if not overwrite:
+                                stats.skipped += 1
+                                continue
+                            if dst_path.is_dir() and not dst_path.is_symlink():
+                                shutil.rmtree(dst_path)
+                            else:
+                                dst_path.unlink()
+                        dst_path.symlink_to(os.readlink(entry.path))
+                        stats.copied += 1
+                    elif entry.is_dir():
+                        stack.append((src_path, dst_path))
+                    else:
+                        futures.append(executor.submit(_copy_one, src_path, dst_path, overwrite, check_hash))
+        for future in futures:
+            stats.add(future.result())
+
+    logger.debug(
+        f"Copied {source} -> {destination}: {stats.copied} files ({stats.reflinked} reflinked), "
+        f"{stats.skipped} skipped, {stats.bytes} bytes"
+    )
+    return stats
+
+
+def move_path(source: Path, destination: Path):
+    """Rename if possible, else (across devices) copy with copy_tree / copy_file and remove the source"""
+    source, destination = Path(source), Path(destination)
+    try:
+        os.rename(source, destination)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    if source.is_dir() and not source.is_symlink():
+        copy_tree(source, destination, overwrite=True, ignore=())
+        shutil.rmtree(source)
+    else:
+        shutil.move(str(source), str(destination))
+
+
 def move_and_symlink(source: Path, dest: Path):
     if dest.exists():
         raise FileExistsError(f"Destination already exists: {dest}")
-    shutil.move(str(source), str(dest))
+    move_path(source, dest)
     source.symlink_to(dest)
-
-
-def get_backup_path(original_path: Path, suffix: str = "_backup"):
-    backup_path = original_path.parent / (original_path.name + suffix)
-    counter = 1
-    while backup_path.exists():
-        backup_path = original_path.parent / f"{original_path.name}{suffix}({counter})"
-        counter += 1
-    return backup_path
-
-
-def get_latest_backup_path(original_path: Path, suffix: str = "_backup"):
-    backup_path = original_path.parent / (original_path.name + suffix)
-    counter = 1
-    while True:
-        next_path = original_path.parent / f"{original_path.name}{suffix}({counter})"
-        if not next_path.exists():
-            return backup_path
-        backup_path = next_path
-        counter += 1
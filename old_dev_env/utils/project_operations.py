@@ -1,7 +1,7 @@
 from pathlib import Path
 from loguru import logger
 from dev_env.core.settings import settings
-from dev_env.utils.file_operations import copy_tree, get_backup_path, move_and_symlink
+from dev_env.utils.file_operations import copy_tree, move_and_symlink
 import shutil
 
 
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from loguru import logger
+
+from .file_operations import DEFAULT_IGNORE, copy_file
+
+DEFAULT_TEMPLATES_CACHE_DIR = Path("~/.calmmage/cache/templates").expanduser()
+# placeholders that are substituted in file names and file contents
+TEMPLATE_VARIABLES = ["project_name"]
+
+# text file: list of literal strings and {"var": name} substitution points
+Segments = List[Union[str, Dict[str, str]]]
+
+
+@dataclass
+class CompiledTemplate:
+    content_hash: str
+    path: Path  # dir of the compiled template in the cache
+    dirs: List[Segments]  # relative dir paths - including empty dirs
+    # {"path": Segments, "mode": int, "text": Segments} / {"path", "mode", "blob": hash} / {"path", "symlink": target}
+    files: List[Dict]
+
+
+def _split(text: str, variables: Iterable[str]) -> Segments:
+    """Split text into literals and substitution points"""
+    variables = list(variables)
+    if not variables:
+        return [text]
+    pattern = re.compile("|".join(re.escape(v) for v in sorted(variables, key=len, reverse=True)))
+    segments = []
+    last = 0
+    for match in pattern.finditer(text):
+        if match.start() > last:
+            segments.append(text[last : match.start()])
+        segments.append({"var": match.group()})
+        last = match.end()
+    if last < len(text):
+        segments.append(text[last:])
+    return segments
+
+
+def _render(segments: Segments, values: Dict[str, str]) -> str:
+    return "".join(s if isinstance(s, str) else values[s["var"]] for s in segments)
+
+
+def _read_text(path: Path) -> Optional[str]:
+    data = path.read_bytes()
+    if b"\0" in data:
+        return None
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+
+def _iter_template_files(template_dir: Path, ignore: List[str]):
+    """(relative path, DirEntry) of all dirs and files in sorted order"""
+    stack = [template_dir]
+    while stack:
+        dir_path = stack.pop()
+        with os.scandir(dir_path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        for entry in entries:
+            if any(fnmatch(entry.name, pattern) for pattern in ignore):
+                continue
+            yield os.path.relpath(entry.path, template_dir), entry
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(Path(entry.path))
+
+
+class TemplateCache:
+    """
+    Compiled local project templates, keyed by the content hash of the template.
+    A template is parsed once into a manifest: dirs, files, and substitution points in their names and text.
+    A cheap stat fingerprint (paths, sizes, mtimes) maps to the content hash - an unchanged template is not even read.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_TEMPLATES_CACHE_DIR,
+        variables: Iterable[str] = TEMPLATE_VARIABLES,
+        ignore: Iterable[str] = DEFAULT_IGNORE,
+    ):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.variables = list(variables)
+        self.ignore = list(ignore)
+        self.index_path = self.cache_dir / "index.json"
+
+    def _load_index(self) -> Dict[str, str]:
+        if not self.index_path.exists():
+            return {}
+        return json.loads(self.index_path.read_text())
+
+    def _save_index(self, index: Dict[str, str]):
+        tmp_path = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(index, indent=2))
+        os.replace(tmp_path, self.index_path)
+
+    def _fingerprint(self, template_dir: Path) -> str:
+        digest = hashlib.sha256(str(template_dir.absolute()).encode())
+        for rel_path, entry in _iter_template_files(template_dir, self.ignore):
+            st = entry.stat(follow_symlinks=False)
+            digest.update(f"{rel_path}\0{st.st_size}\0{st.st_mtime_ns}\0{st.st_mode}\n".encode())
+        return digest.hexdigest()
+
+    def _content_hash(self, template_dir: Path) -> str:
+        digest = hashlib.sha256(json.dumps(self.variables).encode())
+        for rel_path, entry in _iter_template_files(template_dir, self.ignore):
+            st = entry.stat(follow_symlinks=False)
+            digest.update(f"{rel_path}\0{st.st_mode}\n".encode())
+            if entry.is_symlink():
+                digest.update(os.readlink(entry.path).encode())
+            elif not entry.is_dir(follow_symlinks=False):
+                digest.update(Path(entry.path).read_bytes())
+        return digest.hexdigest()
+
+    def compile(self, template_dir: Path) -> CompiledTemplate:
+        """Compiled template from the cache - compiled now if the template changed"""
+        template_dir = Path(template_dir)
+        index = self._load_index()
+        fingerprint = self._fingerprint(template_dir)
+        content_hash = index.get(fingerprint) or self._content_hash(template_dir)
+        compiled_dir = self.cache_dir / content_hash
+        manifest_path = compiled_dir / "manifest.json"
+
+        if not manifest_path.exists():
+            logger.debug(f"Compiling template {template_dir}")
+            self._compile(template_dir, compiled_dir)
+        if index.get(fingerprint) != content_hash:
+            index[fingerprint] = content_hash
+            self._save_index(index)
+
+        manifest = json.loads(manifest_path.read_text())
+        return CompiledTemplate(content_hash, compiled_dir, manifest["dirs"], manifest["files"])
+
+    def _compile(self, template_dir: Path, compiled_dir: Path):
+        tmp_dir = compiled_dir.with_name(f"{compiled_dir.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        (tmp_dir / "blobs").mkdir(parents=True)
+        dirs, files = [], []
+        for rel_path, entry in _iter_template_files(template_dir, self.ignore):
+            path = _split(rel_path, self.variables)
+            if entry.is_symlink():
+                files.append({"path": path, "symlink": os.readlink(entry.path)})
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(path)
+                continue
+            mode = entry.stat(follow_symlinks=False).st_mode & 0o777
+            text = _read_text(Path(entry.path))
+            if text is not None:
+                files.append({"path": path, "mode": mode, "text": _split(text, self.variables)})
+            else:
+                blob = hashlib.sha256(Path(entry.path).read_bytes()).hexdigest()
+                copy_file(Path(entry.path), tmp_dir / "blobs" / blob)
+                files.append({"path": path, "mode": mode, "blob": blob})
+        (tmp_dir / "manifest.json").write_text(json.dumps({"dirs": dirs, "files": files}))
+        try:
+            os.rename(tmp_dir, compiled_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir)  # compiled concurrently by someone else
+
+    def instantiate(self, template_dir: Path, destination: Path, values: Dict[str, str]) -> Path:
+        """
+        Create a project from the template in one write pass.
+        Args:
+            values: variable -> value. Missing variables are left as is
+        """
+        compiled = self.compile(template_dir)
+        values = {**{v: v for v in self.variables}, **values}
+        destination = Path(destination)
+        destination.mkdir(parents=True, exist_ok=True)
+        for dir_path in compiled.dirs:
+            (destination / _render(dir_path, values)).mkdir(parents=True, exist_ok=True)
+        for file in compiled.files:
+            path = destination / _render(file["path"], values)
+            if "symlink" in file:
+                path.symlink_to(file["symlink"])
+                continue
+            if "blob" in file:
+                copy_file(compiled.path / "blobs" / file["blob"], path)
+            else:
+                with open(path, "w", encoding="utf-8", newline="") as f:
+                    for segment in file["text"]:
+                        f.write(segment if isinstance(segment, str) else values[segment["var"]])
+            os.chmod(path, file["mode"])
+        logger.debug(f"Created {destination} from template {template_dir} ({len(compiled.files)} files)")
+        return destination
+
+
+def to_package_name(name: str) -> str:
+    """Project name usable as a python package name: my-project -> my_project"""
+    return re.sub(r"\W", "_", name)
+
+
+def instantiate_template(template_dir: Path, destination: Path, project_name: str) -> Path:
+    return TemplateCache().instantiate(template_dir, destination, {"project_name": to_package_name(project_name)})
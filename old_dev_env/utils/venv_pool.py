@@ -0,0 +1,267 @@
+"""
+Pool of pre-built virtualenvs for the local project templates.
+
+One ready environment per template, keyed by the hash of the template's pyproject.toml.
+A new project gets a clone of it: files are reflinked or hardlinked, the few files that hold the absolute
+venv path (scripts, activate, pyvenv.cfg) are rewritten for the new location.
+
+Warm the pool in the background:
+    python -m old_dev_env.utils.venv_pool path/to/template [...]
+"""
+
+import errno
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import stat
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from .file_operations import copy_file, reflink_file
+
+DEFAULT_VENV_POOL_DIR = Path("~/.calmmage/cache/venv_pool").expanduser()
+VENV_DIR_NAME = ".venv"
+LOCK_FILE_NAME = "poetry.lock"
+# files tools edit in place (path config, site customization) - always copied, never shared with the pool
+COPIED_FILES = ["*.pth", "pyvenv.cfg", "sitecustomize.py"]
+
+
+def get_pyproject_hash(template_dir: Path) -> str:
+    return hashlib.sha256((Path(template_dir) / "pyproject.toml").read_bytes()).hexdigest()[:16]
+
+
+def _find_relocatable_files(venv_dir: Path) -> List[str]:
+    """Text files that contain the absolute path of the venv. Compiled and binary files are left alone."""
+    needle = os.fsencode(str(venv_dir))
+    found = []
+    for dir_path, _dir_names, file_names in os.walk(venv_dir):
+        for name in file_names:
+            path = os.path.join(dir_path, name)
+            if name.endswith(".pyc") or os.path.islink(path):
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            if needle in data and b"\0" not in data:
+                found.append(os.path.relpath(path, venv_dir))
+    return found
+
+
+class VenvPool:
+    """
+    ~/.calmmage/cache/venv_pool/
+        <hash>/project/.venv   - the environment, installed with `poetry install --no-root`
+        <hash>/project/poetry.lock
+        <hash>/relocate.json   - files that have to be rewritten when cloned
+        <hash>/ready           - written last: the entry is complete
+        index.json             - template name -> hash of its current entry
+    Clones get copy-on-write reflinks where the filesystem supports them - fully independent files.
+    Elsewhere they share the files with the pool by hardlinks: pool files are read-only, so an in-place edit
+    in a project fails instead of leaking into the pool and every other project. pip replaces files
+    rather than editing them, and files edited in place by design (COPIED_FILES) are copied.
+    """
+
+    def __init__(self, root: Path = DEFAULT_VENV_POOL_DIR, workers: int = 8):
+        self.root = Path(root).expanduser()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.json"
+        self.workers = workers
+
+    # region index
+    def _load_index(self) -> Dict[str, str]:
+        if not self.index_path.exists():
+            return {}
+        return json.loads(self.index_path.read_text())
+
+    def _save_index(self, index: Dict[str, str]):
+        tmp_path = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(index, indent=2))
+        os.replace(tmp_path, self.index_path)
+
+    def get_entry(self, template_dir: Path) -> Optional[Path]:
+        """Ready pool entry for the current pyproject.toml of the template, None if not warmed yet"""
+        entry = self.root / get_pyproject_hash(template_dir)
+        return entry if (entry / "ready").exists() else None
+
+    # endregion index
+
+    # region warm
+    def warm(self, template_dir: Path) -> Optional[Path]:
+        """
+        Build the environment of the template, if the pool does not have it yet.
+        Entries of older versions of the template's pyproject.toml are removed.
+        Returns:
+            pool entry, None if the build failed or is running in another process
+        """
+        template_dir = Path(template_dir).absolute()
+        entry = self.root / get_pyproject_hash(template_dir)
+        if (entry / "ready").exists():
+            return entry
+        if shutil.which("poetry") is None:
+            logger.warning("poetry is not installed, can't warm the venv pool")
+            return None
+
+        lock_path = self.root / f"{entry.name}.lock"
+        with open(lock_path, "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logger.debug(f"Venv for {template_dir.name} is being built by another process")
+                return None
+            if (entry / "ready").exists():
+                return entry
+            if not self._build(template_dir, entry):
+                return None
+
+        index = self._load_index()
+        old_hash = index.get(template_dir.name)
+        index[template_dir.name] = entry.name
+        self._save_index(index)
+        if old_hash and old_hash != entry.name and old_hash not in index.values():
+            shutil.rmtree(self.root / old_hash, ignore_errors=True)
+        return entry
+
+    def _build(self, template_dir: Path, entry: Path) -> bool:
+        shutil.rmtree(entry, ignore_errors=True)
+        project = entry / "project"
+        project.mkdir(parents=True)
+        shutil.copyfile(template_dir / "pyproject.toml", project / "pyproject.toml")
+        if (template_dir / LOCK_FILE_NAME).exists():
+            shutil.copyfile(template_dir / LOCK_FILE_NAME, project / LOCK_FILE_NAME)
+
+        logger.info(f"Building venv for template {template_dir.name}")
+        start = time.time()
+        result = subprocess.run(
+            ["poetry", "install", "--no-root", "--no-interaction"],
+            cwd=project,
+            env={**os.environ, "POETRY_VIRTUALENVS_IN_PROJECT": "true", "POETRY_VIRTUALENVS_CREATE": "true"},
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            logger.warning(f"Failed to build venv for template {template_dir.name}: {result.stderr.strip()}")
+            shutil.rmtree(entry, ignore_errors=True)
+            return False
+
+        relocate = _find_relocatable_files(project / VENV_DIR_NAME)
+        (entry / "relocate.json").write_text(json.dumps(relocate))
+        _make_read_only(project / VENV_DIR_NAME)
+        (entry / "ready").touch()
+        logger.info(f"Built venv for template {template_dir.name} in {time.time() - start:.0f}s")
+        return True
+
+    def warm_in_background(self, template_dir: Path) -> subprocess.Popen:
+        """Warm the pool for the template in a detached process - it outlives the caller"""
+        package_root = Path(__file__).parents[len(__name__.split(".")) - 1]
+        python_path = os.pathsep.join(filter(None, [str(package_root), os.environ.get("PYTHONPATH")]))
+        with open(self.root / "warm.log", "a") as log_file:
+            return subprocess.Popen(
+                [sys.executable, "-m", __name__, str(Path(template_dir).absolute())],
+                env={**os.environ, "PYTHONPATH": python_path},
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+
+    # endregion warm
+
+    def clone(self, template_dir: Path, project_dir: Path) -> Optional[Path]:
+        """
+        Clone the pooled environment of the template into project_dir/.venv.
+        Also copies the pool's poetry.lock, if the project has none - `poetry install` is then a no-op.
+        Returns:
+            path of the new venv, None if the pool has no environment for the template
+        """
+        entry = self.get_entry(template_dir)
+        if entry is None:
+            return None
+        project_dir = Path(project_dir).absolute()
+        source = entry / "project" / VENV_DIR_NAME
+        destination = project_dir / VENV_DIR_NAME
+        if destination.exists():
+            raise FileExistsError(f"Venv already exists: {destination}")
+        relocate = set(json.loads((entry / "relocate.json").read_text()))
+        old_prefix, new_prefix = str(source), str(destination)
+
+        files = []
+        for dir_path, dir_names, file_names in os.walk(source):
+            rel_dir = os.path.relpath(dir_path, source)
+            (destination / rel_dir).mkdir(parents=True, exist_ok=True)
+            for name in dir_names + file_names:
+                rel_path = os.path.normpath(os.path.join(rel_dir, name))
+                path = source / rel_path
+                if path.is_symlink():
+                    target = os.readlink(path)
+                    if target.startswith(old_prefix):
+                        target = new_prefix + target[len(old_prefix) :]
+                    (destination / rel_path).symlink_to(target)  # e.g. lib64 -> lib, bin/python
+                elif name in file_names:
+                    files.append(rel_path)
+
+        def clone_file(rel_path: str):
+            source_path, path = source / rel_path, destination / rel_path
+            if rel_path in relocate:
+                data = source_path.read_bytes().replace(os.fsencode(old_prefix), os.fsencode(new_prefix))
+                path.write_bytes(data)
+            elif reflink_file(source_path, path):
+                pass
+            elif any(fnmatch(path.name, pattern) for pattern in COPIED_FILES):
+                copy_file(source_path, path)
+            else:
+                try:
+                    os.link(source_path, path)
+                    return  # shared with the pool - stays read-only
+                except OSError as e:
+                    if e.errno not in (errno.EXDEV, errno.EMLINK, errno.EPERM):
+                        raise
+                    copy_file(source_path, path)  # other filesystem, or too many links
+            # the project's own file - writable, unlike its pool original
+            os.chmod(path, stat.S_IMODE(source_path.stat().st_mode) | stat.S_IWUSR)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(clone_file, files))
+
+        lock_path = entry / "project" / LOCK_FILE_NAME
+        if lock_path.exists() and not (project_dir / LOCK_FILE_NAME).exists():
+            shutil.copyfile(lock_path, project_dir / LOCK_FILE_NAME)
+        logger.info(f"Cloned venv of template {Path(template_dir).name} into {destination} ({len(files)} files)")
+        return destination
+
+
+def _make_read_only(venv_dir: Path):
+    """Drop the write bits of all files - hardlinked clones must not edit them in place"""
+    for dir_path, _dir_names, file_names in os.walk(venv_dir):
+        for name in file_names:
+            path = os.path.join(dir_path, name)
+            if not os.path.islink(path):
+                mode = stat.S_IMODE(os.stat(path).st_mode)
+                os.chmod(path, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def setup_project_venv(template_dir: Path, project_dir: Path) -> Optional[Path]:
+    """
+    Give a new project a ready venv from the pool.
+    If the pool has none for the template, it is warmed in the background - for the next project.
+    """
+    if not (Path(template_dir) / "pyproject.toml").exists():
+        return None
+    pool = VenvPool()
+    venv = pool.clone(template_dir, project_dir)
+    if venv is None:
+        logger.info(f"No pooled venv for template {Path(template_dir).name} yet, warming in the background")
+        pool.warm_in_background(template_dir)
+    return venv
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        VenvPool().warm(Path(path))
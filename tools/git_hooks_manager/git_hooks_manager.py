@@ -2,7 +2,7 @@ from pathlib import Path
 from typing import List, Dict, Optional
 from loguru import logger
 from pydantic_settings import BaseSettings
-from dev_env.core.repo_discovery import discover_local_projects
+from dev_env.core.repo_discovery import iter_local_projects, load_author_index
 import subprocess
 import toml
 import yaml
@@ -36,6 +36,8 @@ class GitHooksConfig(BaseSettings):
             }]
         }
     }
+    # only set up repos with an author matching any of these (substrings of names / emails). Empty - all repos
+    author_patterns: List[str] = []
     
     class Config:
         env_file = ".env"
@@ -180,9 +182,18 @@ def update_pyproject_toml(repo_path: Path) -> None:
 def main():
     config = GitHooksConfig()
     thresholds = QualityThresholds()
-    repos = discover_local_projects()
-    
-    for repo_path in repos:
+    matched, indexed = None, set()
+    if config.author_patterns:
+        # resolved once from the author index - only repos new since the last scan are matched one by one
+        author_index = load_author_index()
+        matched = author_index.find(config.author_patterns)
+        indexed = set(author_index.store.list_repo_paths())
+    # repos are set up as the scan finds them
+    for repo in iter_local_projects():
+        if matched is not None and str(repo.path) not in matched:
+            if str(repo.path) in indexed or not repo.matches_authors(config.author_patterns):
+                continue
+        repo_path = repo.path
         logger.info(f"Setting up quality checks in {repo_path}")
         
         # Create quality report script
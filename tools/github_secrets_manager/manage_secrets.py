@@ -1,7 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from loguru import logger
 from pydantic_settings import BaseSettings
 
 from dev_env.core.git_utils import get_github_client
+from dev_env.core.github_gateway import get_api_metrics
 
 
 class Settings(BaseSettings):
@@ -38,20 +41,19 @@ def add_secret_to_repo(repo, secret_name: str, secret_value: str):
         return False
 
 
-def main(secret_name: str, secret_value: str):
+def main(secret_name: str, secret_value: str, workers: int = 4):
+    # all requests go through the shared github gateway - safe to parallelise, it handles the rate limits
     github_client = get_github_client()
     repos = list_all_repos(github_client)
 
-    success_count = 0
-    fail_count = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda repo: add_secret_to_repo(repo, secret_name, secret_value), repos))
 
-    for repo in repos:
-        if add_secret_to_repo(repo, secret_name, secret_value):
-            success_count += 1
-        else:
-            fail_count += 1
+    success_count = sum(results)
+    fail_count = len(results) - success_count
 
     logger.info(f"Operation completed. Success: {success_count}, Failed: {fail_count}")
+    logger.info(f"Github api: {get_api_metrics()}")
 
 
 if __name__ == "__main__":
@@ -60,6 +62,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Add a secret to all GitHub repositories")
     parser.add_argument("secret_name", help="Name of the secret to add")
     parser.add_argument("secret_value", help="Value of the secret")
+    parser.add_argument("--workers", type=int, default=4, help="Number of repos processed in parallel")
 
     args = parser.parse_args()
-    main(args.secret_name, args.secret_value)
+    main(args.secret_name, args.secret_value, workers=args.workers)